@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AccessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'access'
+
+    def ready(self):
+        from access import checks  # noqa: F401  (registers system checks)
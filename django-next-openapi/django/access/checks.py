@@ -0,0 +1,24 @@
+# access/checks.py
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def password_hashing_profile_check(app_configs, **kwargs):
+    profile = settings.PASSWORD_HASHING_PROFILE
+    if profile not in settings.PASSWORD_HASHER_PROFILES:
+        return [Error(
+            f"Unknown PASSWORD_HASHING_PROFILE {profile!r}.",
+            hint=f"Use one of: {', '.join(settings.PASSWORD_HASHER_PROFILES)}.",
+            id="access.E001",
+        )]
+    if profile == "argon2id":
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            return [Error(
+                "PASSWORD_HASHING_PROFILE is 'argon2id' but argon2-cffi is not installed.",
+                hint="pip install argon2-cffi, or choose the 'scrypt' profile.",
+                id="access.E002",
+            )]
+    return []
@@ -0,0 +1,147 @@
+# access/hashers.py
+"""
+Password hasher profiles.
+
+PASSWORD_HASHING_PROFILE picks the preferred hasher ("argon2id", "scrypt"
+or "pbkdf2"); its cost parameters come from PASSWORD_HASHING_PARAMS. The
+other profiles stay in PASSWORD_HASHERS for verification only, so existing
+hashes keep working and Django rehashes them with the preferred profile on
+the user's next successful login (the same happens when the parameters are
+changed).
+
+With PASSWORD_HASHING_WORKERS > 0 hashing runs on a bounded thread pool
+(hashlib.scrypt, pbkdf2_hmac and argon2-cffi release the GIL). At most
+workers + PASSWORD_HASHING_QUEUE hashes are in flight; beyond that callers
+wait up to PASSWORD_HASHING_WAIT_SECONDS and then get HashingPoolBusy, a
+503 with Retry-After for the API views.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+class HashingPoolBusy(APIException):
+    """All hashing workers and queue slots stayed busy for the wait period."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ins at once, please retry shortly."
+    default_code = "hashing_busy"
+    wait = 1  # DRF turns this into a Retry-After header
+
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_QUEUE)
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hashing")
+    return _pool, _slots
+
+
+@receiver(setting_changed)
+def _reset_pool(setting, **kwargs):
+    global _pool, _slots
+    if setting.startswith("PASSWORD_HASHING_"):
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = _slots = None
+
+
+def _run_on_worker(func, *args):
+    _local.on_worker = True
+    try:
+        return func(*args)
+    finally:
+        _local.on_worker = False
+
+
+def run_hashing(func, *args):
+    """Run `func(*args)` on the hashing pool if one is configured."""
+    # scrypt's verify() calls encode(); don't queue the nested call
+    if settings.PASSWORD_HASHING_WORKERS <= 0 or getattr(_local, "on_worker", False):
+        return func(*args)
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_WAIT_SECONDS):
+        raise HashingPoolBusy()
+    try:
+        return pool.submit(_run_on_worker, func, *args).result()
+    finally:
+        slots.release()
+
+
+def profile_params(profile):
+    return settings.PASSWORD_HASHING_PARAMS[profile]
+
+
+class PooledHasherMixin:
+    profile = None
+
+    def encode(self, password, salt, *args):
+        return run_hashing(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return run_hashing(super().verify, password, encoded)
+
+
+class Argon2idPasswordHasher(PooledHasherMixin, Argon2PasswordHasher):
+    """Django's Argon2 hasher (argon2id variant); needs argon2-cffi."""
+    profile = "argon2id"
+
+    @property
+    def time_cost(self):
+        return profile_params(self.profile)["time_cost"]
+
+    @property
+    def memory_cost(self):
+        return profile_params(self.profile)["memory_cost"]
+
+    @property
+    def parallelism(self):
+        return profile_params(self.profile)["parallelism"]
+
+
+class TunedScryptPasswordHasher(PooledHasherMixin, ScryptPasswordHasher):
+    profile = "scrypt"
+
+    @property
+    def work_factor(self):
+        return profile_params(self.profile)["work_factor"]
+
+    @property
+    def block_size(self):
+        return profile_params(self.profile)["block_size"]
+
+    @property
+    def parallelism(self):
+        return profile_params(self.profile)["parallelism"]
+
+    @property
+    def maxmem(self):
+        # scrypt needs ~128 * r * (N + p) bytes and OpenSSL's default cap is
+        # 32 MiB; leave headroom for verifying hashes made with older settings
+        return max(2 * 128 * self.block_size * (self.work_factor + self.parallelism), 64 * 1024 ** 2)
+
+
+class TunedPBKDF2PasswordHasher(PooledHasherMixin, PBKDF2PasswordHasher):
+    profile = "pbkdf2"
+
+    @property
+    def iterations(self):
+        return profile_params(self.profile)["iterations"]
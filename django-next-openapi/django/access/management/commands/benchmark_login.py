@@ -0,0 +1,53 @@
+# access/management/commands/benchmark_login.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password checks per second (the CPU-bound part of a login) for each "
+        "hashing profile, optionally from several threads at once. No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", action="append", dest="profiles",
+                            help="Profile to measure (repeatable); defaults to all.")
+        parser.add_argument("--logins", type=int, default=20, help="Checks per thread.")
+        parser.add_argument("--threads", type=int, default=1, help="Concurrent login threads.")
+
+    def _measure(self, encoded, logins, threads):
+        def run():
+            for _ in range(logins):
+                check_password("benchmark-password", encoded)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(run) for _ in range(threads)]:
+                future.result()
+        return logins * threads / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        profiles = options["profiles"] or list(settings.PASSWORD_HASHER_PROFILES)
+        self.stdout.write(
+            f"{options['threads']} thread(s), PASSWORD_HASHING_WORKERS={settings.PASSWORD_HASHING_WORKERS}"
+        )
+        for profile in profiles:
+            preferred = settings.PASSWORD_HASHER_PROFILES[profile]
+            hashers = [preferred, *(path for path in settings.PASSWORD_HASHERS if path != preferred)]
+            with override_settings(PASSWORD_HASHERS=hashers):
+                try:
+                    encoded = make_password("benchmark-password")
+                except ValueError as exc:  # e.g. argon2-cffi not installed
+                    self.stdout.write(f"{profile:<10} skipped: {exc}")
+                    continue
+                rate = self._measure(encoded, options["logins"], options["threads"])
+                summary = ", ".join(f"{k}={v}" for k, v in settings.PASSWORD_HASHING_PARAMS[profile].items())
+                self.stdout.write(
+                    f"{profile:<10} {rate:>8.1f} logins/s   "
+                    f"({get_hasher().algorithm}: {summary})"
+                )
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from rest_framework import serializers
 
+from dashboard.fieldsets import SparseFieldsetsMixin
+
 User = get_user_model()
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -35,8 +37,8 @@ class LogoutSerializer(serializers.Serializer):
 class TokenRefreshSerializer(serializers.Serializer):
     pass
 
-class CurrentUserSerializer(serializers.ModelSerializer):
-    groups = GroupSerializer(many=True, read_only=True)
+class CurrentUserSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    groups = GroupSerializer(source="cached_groups", many=True, read_only=True)
 
     class Meta:
         model = User
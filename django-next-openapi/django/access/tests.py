@@ -1,3 +1,95 @@
-from django.test import TestCase
+import os
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from access import hashers
+from access.checks import password_hashing_profile_check
+from dashboard.models import IdempotencyRecord, User
+
+PBKDF2_FIRST = [
+    "access.hashers.TunedPBKDF2PasswordHasher",
+    "access.hashers.TunedScryptPasswordHasher",
+]
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def _login(self, password="pw-12345"):
+        return self.client.post(
+            "/api/auth/login/", {"email": "hash@example.com", "password": password}, format="json"
+        )
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        with override_settings(PASSWORD_HASHERS=PBKDF2_FIRST):
+            user = User.objects.create_user(email="hash@example.com", password="pw-12345")
+        self.assertEqual(identify_hasher(user.password).algorithm, "pbkdf2_sha256")
+
+        self.assertEqual(self._login("wrong").status_code, 401)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, "pbkdf2_sha256")
+
+        self.assertEqual(self._login().status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, "scrypt")
+        self.assertTrue(user.check_password("pw-12345"))
+
+    def test_changed_parameters_trigger_rehash(self):
+        user = User.objects.create_user(email="hash@example.com", password="pw-12345")
+        params = {**settings.PASSWORD_HASHING_PARAMS, "scrypt": {
+            "work_factor": 2 ** 12, "block_size": 8, "parallelism": 1,
+        }}
+        with override_settings(PASSWORD_HASHING_PARAMS=params):
+            self.assertEqual(self._login().status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$4096$"))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0,
+                       PASSWORD_HASHING_WAIT_SECONDS=0.01)
+    def test_pooled_hashing_and_backpressure(self):
+        User.objects.create_user(email="hash@example.com", password="pw-12345")
+        self.assertEqual(self._login().status_code, 200)
+
+        _, slots = hashers._get_pool()
+        slots.acquire()  # the only worker is busy
+        try:
+            response = self._login()
+        finally:
+            slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class PasswordHashingProfileCheckTests(TestCase):
+    def test_unknown_profile_is_reported_not_raised(self):
+        with mock.patch.dict(os.environ, {"PASSWORD_HASHING_PROFILE": "md5"}):
+            loaded = runpy.run_module("main.settings")
+        self.assertEqual(loaded["PASSWORD_HASHERS"][0], "access.hashers.TunedScryptPasswordHasher")
+
+        with override_settings(PASSWORD_HASHING_PROFILE="md5"):
+            errors = password_hashing_profile_check(None)
+        self.assertEqual([error.id for error in errors], ["access.E001"])
+
+
+class RegisterIdempotencyTests(TestCase):
+    def test_retried_registration_replays_first_response(self):
+        client = APIClient()
+        body = {"email": "retry@example.com", "password": "pw-12345", "name": "Retry"}
+        first = client.post("/api/auth/register/", body, format="json", HTTP_IDEMPOTENCY_KEY="signup-1")
+        second = APIClient().post("/api/auth/register/", body, format="json", HTTP_IDEMPOTENCY_KEY="signup-1")
+
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        # Tokens are issued afresh, never replayed from storage
+        self.assertNotEqual(second.cookies["refresh_token"].value, first.cookies["refresh_token"].value)
+        self.assertTrue(second.cookies["refresh_token"]["httponly"])
+        self.assertEqual(User.objects.filter(email="retry@example.com").count(), 1)
+        stored = IdempotencyRecord.objects.get()
+        self.assertNotIn(first.cookies["refresh_token"].value.encode(), bytes(stored.content))
 
-# Create your tests here.
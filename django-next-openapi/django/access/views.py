@@ -6,9 +6,13 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.conf import settings
 from django.utils import timezone
+from drf_spectacular.utils import extend_schema, extend_schema_view
 import logging
 
+from dashboard.filters import sparse_fieldset_parameters
+from dashboard.idempotency import IDEMPOTENCY_KEY_PARAM, IdempotentMixin
 from dashboard.models import User
+from dashboard.response_cache import ResponseCacheMixin
 from access.serializers import (
     LoginSerializer,
     RegisterSerializer,
@@ -45,7 +49,8 @@ def set_auth_cookies(response, refresh, domain):
     )
     return response
 
-class RegisterView(CreateAPIView):
+@extend_schema_view(post=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAM]))
+class RegisterView(IdempotentMixin, CreateAPIView):
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
     serializer_class = RegisterSerializer
@@ -60,6 +65,17 @@ class RegisterView(CreateAPIView):
         set_auth_cookies(response, refresh, HTTP_COOKIE_SUBDOMAIN)
         return response
 
+    def replay_response(self, request, entry):
+        # Auth cookies are not stored with the response; a retry that matched
+        # the first body (password included) is logged in with new tokens
+        response = super().replay_response(request, entry)
+        if response.status_code == status.HTTP_201_CREATED:
+            email = User.objects.normalize_email(request.data.get('email'))
+            user = User.objects.filter(email=email, is_active=True).first()
+            if user is not None:
+                set_auth_cookies(response, RefreshToken.for_user(user), HTTP_COOKIE_SUBDOMAIN)
+        return response
+
 class LoginView(GenericAPIView):
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
@@ -148,9 +164,13 @@ class TokenRefreshView(GenericAPIView):
             
 # ---------------------------------------------------------------------
 # Current User Endpoint
-class CurrentUserView(RetrieveAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fieldset_parameters(CurrentUserSerializer)),
+)
+class CurrentUserView(ResponseCacheMixin, RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CurrentUserSerializer
+    response_cache_scopes = ("user", "perms")
 
     def get_object(self):
         logger.debug("Incoming cookies: %s", self.request.COOKIES)
@@ -1,4 +1,174 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
 from .models import User
+from . import response_cache
+from .perm_cache import get_stats, invalidate_user
+
+CURSOR_VAR = "cursor"
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate from pg_class for unfiltered querysets
+    instead of an exact COUNT(*) over the whole table.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 until the table has been vacuumed/analyzed
+            if row and row[0] >= 0:
+                return row[0]
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Pages by `?cursor=<last pk>` (WHERE pk < cursor) while the list is in its
+    default newest-first order, so deep pages cost the same as the first.
+    Any other ordering falls back to regular page numbers.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = None
+        if CURSOR_VAR in request.GET:
+            request.GET = request.GET.copy()
+            value = request.GET.pop(CURSOR_VAR)[-1]
+            self.cursor = int(value) if value.isdigit() else None
+        super().__init__(request, *args, **kwargs)
+
+    def _keyset_applicable(self):
+        # ModelAdmin.ordering can appear twice (admin default + queryset)
+        ordering = list(dict.fromkeys(self.queryset.query.order_by))
+        return ordering in (["-pk"], ["-id"])
+
+    def get_results(self, request):
+        if not self._keyset_applicable():
+            self.keyset = False
+            return super().get_results(request)
+
+        queryset = self.queryset
+        if self.cursor is not None:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        rows = list(queryset[: self.list_per_page + 1])
+        has_next = len(rows) > self.list_per_page
+
+        self.keyset = True
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows[: self.list_per_page]
+        self.can_show_all = False
+        self.multi_page = has_next or self.cursor is not None
+        self.first_url = self.get_query_string(remove=[PAGE_VAR])
+        self.next_url = (
+            self.get_query_string({CURSOR_VAR: self.result_list[-1].pk}, [PAGE_VAR])
+            if has_next else None
+        )
+
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ("id", "email", "name", "is_active", "is_staff", "is_banned",
+                    "is_email_verified", "todo_total", "created_at")
+    list_display_links = ("id", "email")
+    list_select_related = ("todo_stats",)
+    ordering = ("-id",)
+    sortable_by = ("id", "email", "created_at")  # index-backed columns only
+    search_fields = ("email",)
+    search_help_text = "Email prefix (case-sensitive), exact phone number or user id."
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+    readonly_fields = ("created_at", "updated_at")
+    filter_horizontal = ("groups", "user_permissions")
+    actions = [
+        "ban_users",
+        "verify_emails",
+        "unsubscribe_users",
+        "permission_cache_stats",
+        "invalidate_permission_cache",
+        "response_cache_stats",
+    ]
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Only lookups that can use an index: email prefix (user_email_prefix_idx),
+        # unique phone, primary key. Django's default icontains forces a full scan.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(email__startswith=term) | Q(phone=term)
+        if term.isdigit():
+            condition |= Q(pk=int(term))
+        return queryset.filter(condition), False
+
+    @admin.display(description="Todos")
+    def todo_total(self, obj):
+        stats = getattr(obj, "todo_stats", None)
+        return stats.total if stats else 0
+
+    def _bulk_update(self, request, queryset, message, **values):
+        # One UPDATE for the whole selection instead of per-object save()
+        updated = queryset.update(updated_at=timezone.now(), **values)
+        self.message_user(request, message.format(count=updated), messages.SUCCESS)
+
+    @admin.action(description="Ban selected users", permissions=["change"])
+    def ban_users(self, request, queryset):
+        self._bulk_update(request, queryset, "Banned {count} user(s).", is_banned=True)
+
+    @admin.action(description="Mark email verified", permissions=["change"])
+    def verify_emails(self, request, queryset):
+        self._bulk_update(request, queryset, "Verified {count} user(s).", is_email_verified=True)
+
+    @admin.action(description="Unsubscribe from email and SMS", permissions=["change"])
+    def unsubscribe_users(self, request, queryset):
+        self._bulk_update(
+            request, queryset, "Unsubscribed {count} user(s).",
+            is_email_subscribed=False, is_phone_subscribed=False,
+        )
+
+    @admin.action(description="Show permission cache hit ratio")
+    def permission_cache_stats(self, request, queryset):
+        stats = get_stats()
+        self.message_user(
+            request,
+            f"Permission cache: {stats['ratio']:.1%} hit ratio "
+            f"({stats['hits']} hits, {stats['misses']} misses).",
+            messages.INFO,
+        )
+
+    @admin.action(description="Invalidate permission cache for selected users")
+    def invalidate_permission_cache(self, request, queryset):
+        user_ids = list(queryset.values_list("pk", flat=True))
+        for user_id in user_ids:
+            invalidate_user(user_id)
+        self.message_user(request, f"Invalidated {len(user_ids)} user(s).", messages.SUCCESS)
 
-admin.site.register(User)
\ No newline at end of file
+    @admin.action(description="Show response cache hit ratio")
+    def response_cache_stats(self, request, queryset):
+        stats = response_cache.get_stats()
+        self.message_user(
+            request,
+            f"Response cache: {stats['ratio']:.1%} hit ratio ({stats['local']} local hits, "
+            f"{stats['shared']} shared hits, {stats['miss']} misses).",
+            messages.INFO,
+        )
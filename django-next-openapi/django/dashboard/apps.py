@@ -3,4 +3,11 @@ from django.apps import AppConfig
 
 class DashboardConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "dashboard"
\ No newline at end of file
+    name = "dashboard"
+
+    def ready(self):
+        from dashboard import checks  # noqa: F401  (registers system checks)
+        from dashboard import perm_cache, response_cache
+
+        perm_cache.connect_signals()
+        response_cache.connect_signals()
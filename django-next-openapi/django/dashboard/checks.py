@@ -0,0 +1,173 @@
+# dashboard/checks.py
+from django.core.checks import Error, Tags, Warning, register
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+def _index_columns(model):
+    """
+    Return every index on `model` as a tuple of field names, in index order.
+    Covers the primary key, unique/db_index fields (FKs included),
+    Meta.indexes, unique_together and UniqueConstraint. Partial indexes are
+    left out: they only cover the rows matching their condition.
+    """
+    opts = model._meta
+    columns = [(opts.pk.name,)]
+
+    for field in opts.concrete_fields:
+        if field.unique or field.db_index:
+            columns.append((field.name,))
+
+    for index in opts.indexes:
+        if index.condition is not None:
+            continue
+        columns.append(tuple(name.lstrip("-") for name in index.fields))
+
+    for fields in opts.unique_together:
+        columns.append(tuple(fields))
+
+    for constraint in opts.constraints:
+        fields = getattr(constraint, "fields", None)
+        if fields and getattr(constraint, "condition", None) is None:
+            columns.append(tuple(fields))
+
+    return columns
+
+
+def is_index_backed(model, field_name, scope=()):
+    """
+    True if some index on `model` can serve a filter/sort on `field_name`.
+
+    `scope` lists columns the view always filters by with equality
+    (e.g. ("owner",) for per-user todo lists); they may precede the field
+    in a composite index.
+    """
+    field_name = field_name.lstrip("-")
+    if field_name == "pk":
+        return True
+
+    for columns in _index_columns(model):
+        remaining = list(columns)
+        while remaining and remaining[0] in scope and remaining[0] != field_name:
+            remaining.pop(0)
+        if remaining and remaining[0] == field_name:
+            return True
+    return False
+
+
+def view_model(view_cls):
+    queryset = getattr(view_cls, "queryset", None)
+    if queryset is not None:
+        return queryset.model
+    serializer_class = getattr(view_cls, "serializer_class", None)
+    return getattr(getattr(serializer_class, "Meta", None), "model", None)
+
+
+def _iter_view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_cls = getattr(pattern.callback, "cls", None)
+            if view_cls is not None:
+                yield view_cls
+
+
+def check_view_query_fields(view_cls):
+    """Return check errors for declared filter/ordering fields without an index."""
+    from dashboard.filters import TimestampFilterBackend, timestamp_fields
+
+    model = view_model(view_cls)
+    if model is None:
+        return []
+
+    declared = []
+    filterset_fields = getattr(view_cls, "filterset_fields", None) or []
+    declared += [("filterset_fields", name) for name in filterset_fields]
+    ordering_fields = getattr(view_cls, "ordering_fields", None) or []
+    if ordering_fields == "__all__":
+        return [
+            Error(
+                f"{view_cls.__name__}.ordering_fields may not be '__all__'.",
+                hint="List the orderable fields explicitly.",
+                obj=view_cls,
+                id="dashboard.E002",
+            )
+        ]
+    declared += [("ordering_fields", name) for name in ordering_fields]
+    if TimestampFilterBackend in getattr(view_cls, "filter_backends", ()):
+        declared += [("timestamp_fields", name) for name in timestamp_fields(view_cls)]
+
+    scope = tuple(getattr(view_cls, "index_scope", ()))
+    errors = []
+    for attr, name in declared:
+        if not is_index_backed(model, name, scope):
+            errors.append(
+                Error(
+                    f"{view_cls.__name__}.{attr} declares '{name}', "
+                    f"which has no supporting index on {model._meta.label}.",
+                    hint="Add an index (Meta.indexes or db_index=True) or drop the field.",
+                    obj=view_cls,
+                    id="dashboard.E001",
+                )
+            )
+    return errors
+
+
+@register()
+def indexed_query_fields_check(app_configs, **kwargs):
+    errors = []
+    seen = set()
+    for view_cls in _iter_view_classes(get_resolver().url_patterns):
+        if view_cls in seen:
+            continue
+        seen.add(view_cls)
+        errors.extend(check_view_query_fields(view_cls))
+    return errors
+
+
+@register(Tags.staticfiles, deploy=True)
+def brotli_installed_check(app_configs, **kwargs):
+    from whitenoise.compress import brotli_installed
+
+    if brotli_installed:
+        return []
+    return [Warning(
+        "Brotli is not installed, so collectstatic only writes gzip variants of static files.",
+        hint="pip install Brotli (see requirements.txt).",
+        id="dashboard.W001",
+    )]
+
+
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared_cache(alias):
+    """True if `alias` is a cache every worker process reads and writes."""
+    from django.conf import settings
+
+    return settings.CACHES[alias]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """Caches invalidated by version bumps are wrong if each worker has its own."""
+    from django.conf import settings
+
+    features = (
+        ("PERMISSION_CACHE_ENABLED", settings.PERMISSION_CACHE_ALIAS),
+        ("RESPONSE_CACHE_ENABLED", settings.RESPONSE_CACHE_SHARED_ALIAS or "default"),
+        ("SLOW_QUERY_REPORT_ENABLED", "default"),
+        ("PROFILER_ENABLED", "default"),
+    )
+    return [
+        Error(
+            f"{name} needs a shared cache, but '{alias}' is local to each process.",
+            hint=f"Set CACHE_REDIS_URL, or disable {name}.",
+            id="dashboard.E003",
+        )
+        for name, alias in features
+        if getattr(settings, name) and not is_shared_cache(alias)
+    ]
@@ -0,0 +1,146 @@
+# dashboard/compression.py
+"""
+Content-negotiated compression of JSON responses (CompressionMiddleware).
+
+The encoding is the client's most preferred one (by Accept-Encoding q value)
+among RESPONSE_COMPRESSION_ENCODINGS, ties going to the order of that list.
+zstd and br need the optional `zstandard` and `Brotli` packages and are
+skipped when they aren't installed; gzip is always available.
+
+Bodies under RESPONSE_COMPRESSION_MIN_SIZE are sent as is. The level comes
+from RESPONSE_COMPRESSION_LEVELS by body size: small bodies are cheap to
+compress hard, large ones use a faster level to bound CPU per request.
+Streaming responses have no known size and use the last (fastest) tier,
+with each chunk flushed so clients still receive data as it's produced.
+
+`manage.py benchmark_compression` shows bytes and CPU time per level.
+"""
+import zlib
+from collections import namedtuple
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+Encoder = namedtuple("Encoder", ["compress", "stream"])
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits 31: deflate with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+ENCODERS = {"gzip": Encoder(lambda data, level: zlib.compress(data, level, wbits=31), _GzipStream)}
+if brotli is not None:
+    ENCODERS["br"] = Encoder(lambda data, level: brotli.compress(data, quality=level), _BrotliStream)
+if zstandard is not None:
+    ENCODERS["zstd"] = Encoder(
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _ZstdStream
+    )
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header; malformed q values count as 0."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in settings.RESPONSE_COMPRESSION_ENCODINGS:
+        if name not in ENCODERS:
+            continue
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def level_for(encoding, size):
+    """Level for a body of `size` bytes (None: unknown, i.e. streaming)."""
+    tiers = settings.RESPONSE_COMPRESSION_LEVELS[encoding]
+    if size is not None:
+        for max_size, level in tiers:
+            if max_size is None or size <= max_size:
+                return level
+    return tiers[-1][1]
+
+
+def is_json(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type == "application/json" or content_type.endswith("+json")
+
+
+def compress(encoding, data, level):
+    return ENCODERS[encoding].compress(data, level)
+
+
+def compress_stream(encoding, chunks, level):
+    stream = ENCODERS[encoding].stream(level)
+    for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_stream(encoding, chunks, level):
+    stream = ENCODERS[encoding].stream(level)
+    async for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
@@ -0,0 +1,46 @@
+# dashboard/counters.py
+"""
+Report counters kept in the shared cache (the slow-query report, profiles).
+
+Every value lives under its own key and is changed with cache.incr(), so
+concurrent processes never overwrite each other's updates. Entries are
+listed through a registry of numbered slots: the first writer of an entry
+claims the next slot, up to a limit; entries beyond it are still counted
+but not listed.
+"""
+from django.core.cache import cache
+
+
+def incr(key, delta=1):
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:  # deleted between add() and incr()
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def register(registry, key, value, limit):
+    """Store `value` under `key` once, listing `key` in `registry` if there is room."""
+    if not cache.add(key, value, timeout=None):
+        return
+    slot = incr(registry)
+    if slot <= limit:
+        cache.set(f"{registry}:{slot}", key, timeout=None)
+
+
+def registered(registry, limit):
+    """{key: value} of the entries listed in `registry`."""
+    filled = min(cache.get(registry, 0), limit)
+    keys = list(cache.get_many([f"{registry}:{slot}" for slot in range(1, filled + 1)]).values())
+    return cache.get_many(keys)
+
+
+def unregister(registry, limit, suffixes=()):
+    """Delete the registry and its entries, plus each entry's `key + suffix` counters."""
+    filled = min(cache.get(registry, 0), limit)
+    slot_keys = [f"{registry}:{slot}" for slot in range(1, filled + 1)]
+    keys = list(cache.get_many(slot_keys).values())
+    cache.delete_many([
+        registry, *slot_keys, *keys, *(key + suffix for key in keys for suffix in suffixes),
+    ])
@@ -0,0 +1,86 @@
+# dashboard/fieldsets.py
+"""
+Sparse fieldsets: `?fields=a,b` keeps only those fields, `?exclude=c`
+drops them. Serializers trim their output through SparseFieldsetsMixin and
+SparseFieldsetFilterBackend (dashboard.filters) narrows the SQL to match.
+Only read requests are affected, so write payloads are never trimmed.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def _split(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_requested_fields(request, available):
+    """
+    Return the subset of `available` field names selected by the query string,
+    or None when no sparse fieldset was requested.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+
+    params = request.query_params
+    fields = _split(params.get(FIELDS_PARAM, ""))
+    exclude = _split(params.get(EXCLUDE_PARAM, ""))
+    if not fields and not exclude:
+        return None
+
+    unknown = [name for name in fields + exclude if name not in available]
+    if unknown:
+        raise ValidationError(
+            {"fields": f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(available)}."}
+        )
+
+    selected = [name for name in available if not fields or name in fields]
+    return [name for name in selected if name not in exclude]
+
+
+def get_model_columns(serializer_class, field_names):
+    """
+    Map serializer field names to `.only()` paths and the relations that
+    need select_related. Fields without a concrete model column are skipped.
+    """
+    model = serializer_class.Meta.model
+    declared = serializer_class().fields
+    only, related = {model._meta.pk.name}, set()
+
+    for name in field_names:
+        field = declared.get(name)
+        if field is None or field.source == "*":
+            continue
+        parts = field.source.split(".")
+        try:
+            model_field = model._meta.get_field(parts[0])
+        except FieldDoesNotExist:
+            continue
+        if not model_field.concrete or model_field.many_to_many:
+            continue
+        if len(parts) > 1 and isinstance(model_field, models.ForeignKey):
+            related.add(parts[0])
+            only.add(parts[0])
+            only.add("__".join(parts))
+        else:
+            only.add(model_field.name)
+
+    return sorted(only), sorted(related)
+
+
+class SparseFieldsetsMixin:
+    """Serializer mixin dropping fields not selected via ?fields= / ?exclude=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        selected = get_requested_fields(request, list(self.fields))
+        if selected is None:
+            return
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
@@ -2,9 +2,18 @@
 from typing import List
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
-from rest_framework.filters import BaseFilterBackend
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
 
+from dashboard.checks import is_index_backed, view_model
+from dashboard.fieldsets import (
+    EXCLUDE_PARAM,
+    FIELDS_PARAM,
+    get_model_columns,
+    get_requested_fields,
+)
+
 DATETIME_OPS = ("gte", "lte")
 TIMESTAMP_FIELDS = ("created_at", "updated_at")
 
@@ -22,22 +31,56 @@ def _parse_datetime(value):
     return dt
 
 
+def timestamp_fields(view):
+    """
+    Timestamp fields TimestampFilterBackend filters `view` by: its
+    `timestamp_fields` if declared (dashboard.checks verifies those are
+    index-backed), else the model's timestamps that have an index.
+    """
+    declared = getattr(view, "timestamp_fields", None)
+    if declared is not None:
+        return tuple(declared)
+    model = view_model(view)
+    if model is None:
+        return ()
+    names = {field.name for field in model._meta.get_fields()}
+    scope = tuple(getattr(view, "index_scope", ()))
+    return tuple(
+        field for field in TIMESTAMP_FIELDS if field in names and is_index_backed(model, field, scope)
+    )
+
+
 class TimestampFilterBackend(BaseFilterBackend):
     """
     Global filter backend that:
-    - supports query params:
+    - supports query params such as
         created_at__gte, created_at__lte,
         updated_at__gte, updated_at__lte
-      (ISO-8601 date/time strings)
+      (ISO-8601 date/time strings) for the view's `timestamp_fields`
     - applies them to queryset
     - exposes OpenAPI params to drf-spectacular automatically
+    Only index-backed fields are offered (see `timestamp_fields`), so the
+    filters never scan a whole table. A filter on any other timestamp is
+    rejected with 400 rather than ignored, which would return unfiltered
+    rows as if they matched.
     """
 
     def filter_queryset(self, request, queryset, view):
         q = queryset
         params = request.query_params
+        fields = timestamp_fields(view)
 
-        for field in TIMESTAMP_FIELDS:
+        unsupported = [
+            f"{field}__{op}"
+            for field in TIMESTAMP_FIELDS if field not in fields
+            for op in DATETIME_OPS if f"{field}__{op}" in params
+        ]
+        if unsupported:
+            raise ValidationError({
+                name: "Filtering by this field is not supported here." for name in unsupported
+            })
+
+        for field in fields:
             for op in DATETIME_OPS:
                 key = f"{field}__{op}"
                 if key in params:
@@ -53,26 +96,8 @@ class TimestampFilterBackend(BaseFilterBackend):
         Return OpenAPI-style parameter dicts for drf-spectacular.
         Some drf-spectacular versions expect plain dicts (not OpenApiParameter instances).
         """
-        # try to discover the model from view.queryset or serializer_class.Meta.model
-        model = None
-        queryset = getattr(view, "queryset", None)
-        if queryset is not None:
-            model = getattr(queryset, "model", None)
-
-        if model is None:
-            serializer_class = getattr(view, "serializer_class", None)
-            if serializer_class is not None:
-                model = getattr(getattr(serializer_class, "Meta", None), "model", None)
-
         params = []
-        if model is None:
-            model_fields_available = {f for f in TIMESTAMP_FIELDS}
-        else:
-            model_fields_available = {
-                f.name for f in model._meta.get_fields() if f.name in TIMESTAMP_FIELDS
-            }
-
-        for field in model_fields_available:
+        for field in timestamp_fields(view):
             for op in DATETIME_OPS:
                 name = f"{field}__{op}"
                 params.append(
@@ -89,3 +114,113 @@ class TimestampFilterBackend(BaseFilterBackend):
                 )
 
         return params
+
+
+class IndexedOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that only honours the view's explicit `ordering_fields`.
+
+    DRF falls back to every serializer field when a view declares nothing,
+    which lets clients sort on unindexed columns. Here an undeclared view is
+    simply not orderable, and `dashboard.checks` verifies every declared
+    field is index-backed. The allowed values are published as an enum.
+    """
+
+    def get_default_valid_fields(self, queryset, view, context={}):
+        return []
+
+    def get_schema_operation_parameters(self, view) -> List[dict]:
+        fields = getattr(view, "ordering_fields", None) or []
+        if not fields or fields == "__all__":
+            return []
+
+        choices = []
+        for field in fields:
+            choices += [field, f"-{field}"]
+
+        return [
+            {
+                "name": self.ordering_param,
+                "in": "query",
+                "required": False,
+                "description": "Which field(s) to use when ordering the results.",
+                "schema": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": choices},
+                },
+                "style": "form",
+                "explode": False,
+            }
+        ]
+
+
+class SparseFieldsetFilterBackend(BaseFilterBackend):
+    """
+    Narrows the SELECT to the columns needed for ?fields= / ?exclude=
+    (see dashboard.fieldsets) and documents both params with the
+    serializer's field names as enum values.
+    """
+
+    def _serializer_class(self, view):
+        try:
+            return view.get_serializer_class()
+        except (AssertionError, AttributeError):
+            return None
+
+    def filter_queryset(self, request, queryset, view):
+        serializer_class = self._serializer_class(view)
+        if serializer_class is None:
+            return queryset
+
+        available = list(serializer_class().fields)
+        selected = get_requested_fields(request, available)
+        if selected is None:
+            return queryset
+
+        required = list(getattr(view, "sparse_required_fields", ()))
+        only, related = get_model_columns(serializer_class, selected)
+        # Reset joins so a relation the view selects by default is not
+        # both deferred and traversed.
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only, *required)
+
+    def get_schema_operation_parameters(self, view) -> List[dict]:
+        serializer_class = self._serializer_class(view)
+        if serializer_class is None:
+            return []
+        return [
+            {
+                "name": param.name,
+                "in": "query",
+                "required": False,
+                "description": param.description,
+                "schema": param.type,
+                "style": "form",
+                "explode": False,
+            }
+            for param in sparse_fieldset_parameters(serializer_class)
+        ]
+
+
+def sparse_fieldset_parameters(serializer_class) -> List[OpenApiParameter]:
+    """
+    drf-spectacular only asks filter backends for list operations; detail
+    views that support sparse fieldsets add these via @extend_schema.
+    """
+    names = [
+        name for name, field in serializer_class().fields.items()
+        if not field.write_only
+    ]
+    schema = {"type": "array", "items": {"type": "string", "enum": names}}
+    return [
+        OpenApiParameter(
+            FIELDS_PARAM, schema, OpenApiParameter.QUERY, explode=False, style="form",
+            description="Comma-separated fields to include in the response.",
+        ),
+        OpenApiParameter(
+            EXCLUDE_PARAM, schema, OpenApiParameter.QUERY, explode=False, style="form",
+            description="Comma-separated fields to omit from the response.",
+        ),
+    ]
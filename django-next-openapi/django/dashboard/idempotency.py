@@ -0,0 +1,245 @@
+# dashboard/idempotency.py
+"""
+Idempotency-Key support for write endpoints.
+
+A client that may retry a POST sends a unique `Idempotency-Key` header. The
+first request with a given key (per view and user) claims it by inserting a
+pending dashboard.models.IdempotencyRecord (the key column is unique, so
+exactly one INSERT ... ON CONFLICT DO NOTHING lands), runs normally, and
+stores its response on that row and in the cache for IDEMPOTENCY_TTL
+seconds. Repeats get that response back without running the view again,
+marked with `Idempotent-Replayed: true`:
+
+- a repeat arriving while the first request is still running waits for its
+  result, polling with backoff (up to IDEMPOTENCY_WAIT_SECONDS, then 409
+  with Retry-After);
+- a repeat with a different body is rejected with 422;
+- 5xx responses are not stored, so the request can be retried for real;
+- cookies are never stored: they may carry credentials. Views that set
+  them override IdempotentMixin.replay_response() to issue fresh ones.
+
+A claim whose request died is taken over after IDEMPOTENCY_LOCK_TIMEOUT.
+
+Entries expire from the cache on their own; expired rows are deleted by the
+purge_idempotency_records task.
+"""
+import hashlib
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from dashboard.models import IdempotencyRecord
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05  # first wait of a duplicate; doubles up to MAX_POLL_SECONDS
+MAX_POLL_SECONDS = 1
+
+IDEMPOTENCY_KEY_PARAM = OpenApiParameter(
+    "Idempotency-Key", str, OpenApiParameter.HEADER,
+    description="Unique key per logical request; retries with the same key replay the first response.",
+)
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = "idempotency_in_progress"
+    wait = 1
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = "idempotency_key_reused"
+
+
+def _cache_key(key):
+    return f"idem:{key}"
+
+
+def record_key(request, client_key):
+    scope = request.user.pk if request.user.is_authenticated else "anon"
+    return hashlib.sha256(f"{request.path}:{scope}:{client_key}".encode("utf-8")).hexdigest()
+
+
+def fingerprint(request):
+    # Keyed, so stored fingerprints of register bodies don't expose passwords
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return salted_hmac("idempotency", f"{request.method}:{body}").hexdigest()
+
+
+def _entry(record, now):
+    """Cache and return the stored entry of a finished `record`."""
+    entry = {
+        "fingerprint": record.fingerprint,
+        "status": record.status_code,
+        "content_type": record.content_type,
+        "content": bytes(record.content),
+    }
+    remaining = (record.expires_at - now).total_seconds()
+    cache.set(_cache_key(record.key), entry, timeout=max(int(remaining), 1))
+    return entry
+
+
+def store(key, request_fingerprint, response):
+    entry = {
+        "fingerprint": request_fingerprint,
+        "status": response.status_code,
+        "content_type": response["Content-Type"],
+        "content": response.content,
+    }
+    IdempotencyRecord.objects.update_or_create(
+        key=key,
+        defaults={
+            "fingerprint": entry["fingerprint"],
+            "status_code": entry["status"],
+            "content_type": entry["content_type"],
+            "content": entry["content"],
+            "expires_at": timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+        },
+    )
+    cache.set(_cache_key(key), entry, timeout=settings.IDEMPOTENCY_TTL)
+
+
+def _claimed_until(now):
+    return now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+
+
+def _insert_claim(key, token, now):
+    # ON CONFLICT DO NOTHING: losing the race is not an error, so there is no
+    # savepoint to roll back and nothing in the database log
+    IdempotencyRecord.objects.bulk_create(
+        [IdempotencyRecord(key=key, fingerprint=token, expires_at=_claimed_until(now))],
+        ignore_conflicts=True,
+    )
+
+
+def _take_over(key, token, now):
+    return IdempotencyRecord.objects.filter(key=key, expires_at__lte=now).update(
+        fingerprint=token, status_code=None, content_type="", content=b"", expires_at=_claimed_until(now),
+    ) == 1
+
+
+def acquire(key):
+    """
+    The stored entry for `key`, or None once this request has claimed the
+    key and should run the view. Waits while another request holds it,
+    polling with backoff; each poll is one SELECT.
+    """
+    entry = cache.get(_cache_key(key))
+    # Marks our pending row: bulk_create(ignore_conflicts=True) can't say
+    # whether it inserted anything
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = POLL_SECONDS
+    while entry is None:
+        record = IdempotencyRecord.objects.filter(key=key).first()
+        now = timezone.now()
+        if record is None:
+            _insert_claim(key, token, now)
+            continue
+        if record.status_code is None and record.fingerprint == token:
+            return None
+        if record.expires_at <= now:
+            # A claim whose request died, or a stored response not yet purged
+            if _take_over(key, token, now):
+                return None
+            continue
+        if record.status_code is not None:
+            return _entry(record, now)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise IdempotencyConflict()
+        # Wake up no later than the claim expires, to take it over
+        time.sleep(min(delay, remaining, (record.expires_at - now).total_seconds()))
+        delay = min(delay * 2, MAX_POLL_SECONDS)
+        entry = cache.get(_cache_key(key))
+    return entry
+
+
+def release(key):
+    """Drop an unfinished claim so the request can be retried."""
+    IdempotencyRecord.objects.filter(key=key, status_code__isnull=True).delete()
+
+
+def replay(entry):
+    response = HttpResponse(entry["content"], status=entry["status"], content_type=entry["content_type"])
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired records in batches; returns the number deleted."""
+    purged = 0
+    while True:
+        ids = list(
+            IdempotencyRecord.objects.filter(expires_at__lte=timezone.now())
+            .order_by()
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return purged
+        purged += IdempotencyRecord.objects.filter(pk__in=ids).delete()[0]
+
+
+class IdempotentMixin:
+    """Honours the Idempotency-Key header on POST (see module docstring)."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._idempotency = None
+        client_key = request.META.get(HEADER)
+        if request.method != "POST" or not client_key:
+            return
+        if len(client_key) > MAX_KEY_LENGTH:
+            raise ValidationError({"detail": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters."})
+
+        key = record_key(request, client_key)
+        request_fingerprint = fingerprint(request)
+        entry = acquire(key)
+        if entry is None:
+            self._idempotency = (key, request_fingerprint)
+            return
+        if entry["fingerprint"] != request_fingerprint:
+            raise IdempotencyKeyReused()
+
+        def replay_handler(request, *args, **kwargs):
+            return self.replay_response(request, entry)
+
+        self.post = replay_handler
+
+    def replay_response(self, request, entry):
+        """The response for a repeat of a stored request."""
+        return replay(entry)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        pending = getattr(self, "_idempotency", None)
+        if pending is not None and response.status_code < 500:
+            # Rendered now so waiting duplicates can be answered before we return
+            response.render()
+            store(*pending, response)
+            self._idempotency = None
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # 5xx responses, and exceptions that escape DRF's handler, leave
+            # the claim unfinished
+            pending = getattr(self, "_idempotency", None)
+            if pending is not None:
+                release(pending[0])
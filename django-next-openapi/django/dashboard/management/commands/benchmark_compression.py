@@ -0,0 +1,55 @@
+# dashboard/management/commands/benchmark_compression.py
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from dashboard.compression import ENCODERS, compress, level_for
+from dashboard.management.commands.benchmark_serializers import _todos, _users
+from dashboard.serializers.general import TodoSerializer, UserSerializer
+
+LEVELS = {
+    "gzip": [1, 4, 6, 9],
+    "br": [1, 4, 6, 9, 11],
+    "zstd": [1, 3, 9, 19],
+}
+
+
+def _payloads(renderer):
+    for label, serializer_class, make, rows in (
+        ("todos x100", TodoSerializer, _todos, 100),
+        ("users x100", UserSerializer, _users, 100),
+        ("todos x1000", TodoSerializer, _todos, 1000),
+    ):
+        # Shaped like a paginated list response
+        body = {"count": rows, "next": None, "previous": None,
+                "results": serializer_class(make(rows), many=True).data}
+        yield label, renderer.render(body)
+
+
+class Command(BaseCommand):
+    help = "Bytes on the wire and CPU time per response for each compression level (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Compressions per measurement.")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        missing = sorted(set(LEVELS) - set(ENCODERS))
+        if missing:
+            self.stdout.write(f"Not installed, skipped: {', '.join(missing)}")
+
+        for label, body in _payloads(JSONRenderer()):
+            self.stdout.write(f"\n{label}: {len(body):,} bytes uncompressed")
+            for encoding in ENCODERS:
+                chosen = level_for(encoding, len(body))
+                for level in LEVELS[encoding]:
+                    start = time.process_time()
+                    for _ in range(repeat):
+                        compressed = compress(encoding, body, level)
+                    cpu_us = (time.process_time() - start) / repeat * 1e6
+                    self.stdout.write(
+                        f"  {encoding:<5} level {level:>2}  {len(compressed):>9,} bytes  "
+                        f"{len(compressed) / len(body):>6.1%}  {cpu_us:>9,.0f} us CPU"
+                        f"{'   <- used' if level == chosen else ''}"
+                    )
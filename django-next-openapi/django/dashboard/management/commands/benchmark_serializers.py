@@ -0,0 +1,77 @@
+# dashboard/management/commands/benchmark_serializers.py
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from dashboard.models import Todo, User
+from dashboard.serializers.compiled import compile_serializer
+from dashboard.serializers.general import TodoSerializer, UserSerializer
+
+
+def _users(count):
+    now = timezone.now()
+    return [
+        User(id=index + 1, email=f"user{index}@example.com", name=f"User {index}",
+             phone=f"+1555{index:07d}", birthday=now, created_at=now, updated_at=now)
+        for index in range(count)
+    ]
+
+
+def _todos(count):
+    owner = User(id=1, email="owner@example.com")
+    now = timezone.now()
+    return [
+        Todo(id=uuid.uuid4(), owner=owner, title=f"Todo {index}", description="x" * 200,
+             is_complete=bool(index % 2), created_at=now, updated_at=now)
+        for index in range(count)
+    ]
+
+
+def _as_row(instance, compiled):
+    # What .values() returns for the compiled columns
+    row = {}
+    for _, key, _ in compiled.columns:
+        *path, name = key.split("__")
+        obj = instance
+        for attr in path:
+            obj = getattr(obj, attr)
+        row[key] = getattr(obj, obj._meta.get_field(name).attname)
+    return row
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of the regular and compiled list serializers (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Rows per page.")
+        parser.add_argument("--repeat", type=int, default=200, help="Pages per measurement.")
+
+    def _rate(self, func, rows, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return rows * repeat / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        renderer = JSONRenderer()
+        for serializer_class, instances in (
+            (TodoSerializer, _todos(rows)),
+            (UserSerializer, _users(rows)),
+        ):
+            compiled = compile_serializer(serializer_class)
+            values = [_as_row(instance, compiled) for instance in instances]
+
+            regular = renderer.render(serializer_class(instances, many=True).data)
+            if renderer.render(compiled.serialize(values)) != regular:
+                raise CommandError(f"Compiled {serializer_class.__name__} output differs.")
+
+            before = self._rate(lambda: serializer_class(instances, many=True).data, rows, repeat)
+            after = self._rate(lambda: compiled.serialize(values), rows, repeat)
+            self.stdout.write(
+                f"{serializer_class.__name__:<16} regular {before:>12,.0f} rows/s   "
+                f"compiled {after:>12,.0f} rows/s   x{after / before:.1f}"
+            )
@@ -0,0 +1,39 @@
+# dashboard/management/commands/profile_startup.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.startup import by_package, loaded_lazy_modules, profile_imports, total_ms
+
+
+class Command(BaseCommand):
+    help = "Report import cost per package and module of a cold start (main.wsgi by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", default="main.wsgi", help="Module to import, e.g. main.celery.")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--modules", action="store_true", help="List individual modules by cumulative time.")
+
+    def handle(self, *args, **options):
+        try:
+            records = profile_imports(options["target"])
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        total = total_ms(records)
+        self.stdout.write(
+            f"{options['target']}: {total:.1f}ms in imports, {len(records)} modules "
+            f"(budget {settings.STARTUP_IMPORT_BUDGET_MS}ms)"
+        )
+        self.stdout.write("\nSelf time by package:")
+        for package, ms in by_package(records)[: options["top"]]:
+            self.stdout.write(f"{ms:>10.1f}ms  {package}")
+
+        if options["modules"]:
+            self.stdout.write("\nCumulative time by module:")
+            ranked = sorted(records, key=lambda record: record.cumulative_us, reverse=True)
+            for record in ranked[: options["top"]]:
+                self.stdout.write(f"{record.cumulative_us / 1000:>10.1f}ms  {record.module}")
+
+        lazy = loaded_lazy_modules(records)
+        if lazy:
+            self.stdout.write(self.style.WARNING(f"\nLoaded eagerly but meant to be lazy: {', '.join(lazy)}"))
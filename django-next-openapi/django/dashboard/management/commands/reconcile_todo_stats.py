@@ -0,0 +1,37 @@
+# dashboard/management/commands/reconcile_todo_stats.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from dashboard.models import TodoStats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recount per-user todo counters (TodoStats) and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only reconcile this user id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if options["users"]:
+            user_ids = iter(options["users"])
+        else:
+            user_ids = User.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=batch_size)
+
+        repaired = checked = 0
+        batch = []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                repaired += TodoStats.objects.reconcile(batch)
+                checked += len(batch)
+                batch = []
+        if batch:
+            repaired += TodoStats.objects.reconcile(batch)
+            checked += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, repaired {repaired}."))
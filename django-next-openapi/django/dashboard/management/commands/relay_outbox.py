@@ -0,0 +1,31 @@
+# dashboard/management/commands/relay_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from dashboard.outbox import relay_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events; runs as a standalone relay process unless --once."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single relay pass and exit.")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to sleep when there is nothing to deliver.")
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            stats = relay_outbox(batch_size=options["batch_size"])
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Dispatched {stats['dispatched']}, coalesced {stats['coalesced']}, "
+                    f"retried {stats['retried']}, failed {stats['failed']}."
+                ))
+                return
+            # Keep going while the backlog lasts, back off when idle or locked out
+            if stats["locked"] or not (stats["dispatched"] or stats["coalesced"]):
+                time.sleep(options["interval"])
@@ -0,0 +1,30 @@
+# dashboard/management/commands/slow_query_report.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.querybudget import reset_slow_query_report, slow_query_report
+
+
+class Command(BaseCommand):
+    help = "Show the slowest queries recorded by QueryBudgetMiddleware, by total time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--reset", action="store_true", help="Clear the report afterwards.")
+
+    def handle(self, *args, **options):
+        if not settings.SLOW_QUERY_REPORT_ENABLED:
+            self.stderr.write("SLOW_QUERY_REPORT_ENABLED is off (it needs CACHE_REDIS_URL); "
+                              "slow queries are only logged.")
+        entries = slow_query_report(options["top"])
+        if not entries:
+            self.stdout.write("No slow queries recorded.")
+        for entry in entries:
+            self.stdout.write(
+                f"{entry['total_ms']:>10.1f}ms total  {entry['count']:>6}x  "
+                f"avg {entry['avg_ms']:.1f}ms  max {entry['max_ms']:.1f}ms  "
+                f"{entry['view']}  [{entry['sql_id']}]"
+            )
+            self.stdout.write(f"    {entry['sql'][:300]}")
+        if options["reset"]:
+            reset_slow_query_report()
@@ -1,6 +1,19 @@
 import logging
 import json
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from dashboard import compression, profiler
+from dashboard.querybudget import TIMEOUT_DETAIL, QueryBudget, is_statement_timeout, view_name
 
 logger = logging.getLogger("dashboard")
 
@@ -40,3 +53,160 @@ class RequestLoggingMiddleware(MiddlewareMixin):
             f"BODY: {resp_data}"
         )
         return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Bounds query time per view and records slow queries (dashboard.querybudget).
+
+    The budget is the view's `statement_timeout` attribute (ms), else
+    STATEMENT_TIMEOUTS[url name], else STATEMENT_TIMEOUT_MS. Admin and static
+    requests are left unbounded. Timeouts are answered with a 503.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget = QueryBudget(connection)
+        request._query_budget = budget
+        try:
+            with connection.execute_wrapper(budget):
+                return self.get_response(request)
+        finally:
+            budget.reset()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(request, "_query_budget", None)
+        if budget is None:
+            return None
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        budget.set_view(view_func, request.path, url_name)
+        return None
+
+    def process_exception(self, request, exception):
+        if not is_statement_timeout(exception):
+            return None
+        budget = getattr(request, "_query_budget", None)
+        logger.warning(
+            "Statement timeout (%sms) in %s %s",
+            getattr(budget, "timeout_ms", "?"), request.method, request.path,
+        )
+        response = JsonResponse(
+            {"detail": TIMEOUT_DETAIL},
+            status=503,
+        )
+        response["Retry-After"] = "5"
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Samples the stacks of selected requests (dashboard.profiler). Removed at
+    startup unless PROFILER_ENABLED, so it costs nothing when switched off.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            sampler = getattr(request, "_profiler", None)
+            if sampler is not None:
+                profiler.record_profile(request._profiler_view, sampler.stop())
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.path.startswith("/static"):
+            return None
+        if request.META.get(profiler.HEADER) == "1":
+            if not self._is_staff(request):
+                return None
+        elif not profiler.should_sample(request):
+            return None
+        request._profiler_view = view_name(view_func)
+        request._profiler = profiler.start_sampler()
+        return None
+
+    def _is_staff(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        # API clients authenticate with JWT cookies/headers, not sessions
+        drf_request = Request(request)
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication_class().authenticate(drf_request)
+            except APIException:
+                return False
+            if result is not None:
+                return result[0].is_staff
+        return False
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, with immutable caching decided by the manifest of
+    dashboard.storage instead of guessing hashes from file names.
+    """
+    def immutable_file_test(self, path, url):
+        if not url.startswith(self.static_prefix):
+            return False
+        is_immutable = getattr(staticfiles_storage, "is_immutable", None)
+        if is_immutable is None:
+            return super().immutable_file_test(path, url)
+        return is_immutable(url[len(self.static_prefix):])
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses JSON responses with gzip, brotli or zstd (dashboard.compression).
+    Listed first in MIDDLEWARE so it runs after everything else has seen
+    the uncompressed body.
+    """
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if (
+            response.has_header("Content-Encoding")
+            or not compression.is_json(response)
+            or "no-transform" in response.get("Cache-Control", "")
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            level = compression.level_for(encoding, None)
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(
+                    encoding, response.streaming_content, level
+                )
+            else:
+                response.streaming_content = compression.compress_stream(
+                    encoding, response.streaming_content, level
+                )
+            del response["Content-Length"]
+        else:
+            size = len(response.content)
+            if size < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+                return response
+            compressed = compression.compress(encoding, response.content, compression.level_for(encoding, size))
+            if len(compressed) >= size:
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # The bytes differ per encoding, so a strong validator would be wrong
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
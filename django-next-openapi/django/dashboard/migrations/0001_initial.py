@@ -0,0 +1,81 @@
+# Generated by Django 4.2.16 on 2026-10-19 14:36
+
+import dashboard.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone', models.CharField(blank=True, max_length=50, null=True, unique=True)),
+                ('avatar', models.URLField(blank=True, null=True)),
+                ('name', models.CharField(blank=True, max_length=255, null=True)),
+                ('birthday', models.DateTimeField(blank=True, null=True)),
+                ('otp', models.CharField(blank=True, max_length=50, null=True)),
+                ('email_unsubscribe_token', models.CharField(default=dashboard.models.generate_cuid, max_length=255, unique=True)),
+                ('referral_code', models.CharField(default=dashboard.models.generate_short_hex, max_length=50, unique=True)),
+                ('is_banned', models.BooleanField(default=False)),
+                ('is_email_verified', models.BooleanField(default=False)),
+                ('is_phone_verified', models.BooleanField(default=False)),
+                ('is_email_subscribed', models.BooleanField(default=False)),
+                ('is_phone_subscribed', models.BooleanField(default=False)),
+                ('is_staff', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TodoStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='todo_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Todo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, default='')),
+                ('is_complete', models.BooleanField(default=False)),
+                ('is_archived', models.BooleanField(default=False, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['owner', 'created_at'], name='todo_owner_created_idx'), models.Index(fields=['owner', 'is_complete', 'created_at'], name='todo_owner_complete_idx'), models.Index(condition=models.Q(('is_archived', False), ('is_complete', True)), fields=['updated_at'], name='todo_archivable_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at'], name='user_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email'], name='user_email_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Optional declarative partitioning of dashboard_todo (PostgreSQL only).
+#
+# Controlled by settings.TODO_PARTITIONING at migrate time:
+#   ""      - leave the table as is (default, and always on other databases)
+#   "range" - hot rows partitioned by month of created_at
+#   "hash"  - hot rows partitioned by hash of owner_id
+# Archived rows live in their own partition either way. Unapplying this
+# migration copies the data back into a plain table.
+#
+# Django still treats `id` as the primary key. PostgreSQL requires the
+# partition keys in the physical key, so it becomes (id, is_archived, <key>);
+# ids are uuid4 so uniqueness on id alone is unaffected.
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = "dashboard_todo"
+OLD_TABLE = "dashboard_todo_unpartitioned"
+HOT_TABLE = "dashboard_todo_hot"
+ARCHIVE_TABLE = "dashboard_todo_archive"
+
+
+def _month_start(day, offset=0):
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _recreate_constraints_and_indexes(schema_editor, Todo, user_table, primary_key):
+    # Only called once the old table is gone, so its index names are free again
+    execute = schema_editor.execute
+    execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY ({primary_key})')
+    execute(
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_owner_id_fk" '
+        f'FOREIGN KEY ("owner_id") REFERENCES "{user_table}" ("id") DEFERRABLE INITIALLY DEFERRED'
+    )
+    execute(f'CREATE INDEX "{TABLE}_owner_id_idx" ON "{TABLE}" ("owner_id")')
+    for index in Todo._meta.indexes:
+        schema_editor.add_index(Todo, index)
+
+
+def partition(apps, schema_editor):
+    strategy = getattr(settings, "TODO_PARTITIONING", "")
+    if schema_editor.connection.vendor != "postgresql" or not strategy:
+        return
+    if strategy not in ("range", "hash"):
+        raise ValueError(f"Unknown TODO_PARTITIONING {strategy!r}; use 'range' or 'hash'.")
+
+    Todo = apps.get_model("dashboard", "Todo")
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+    key = "created_at" if strategy == "range" else "owner_id"
+
+    execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+    execute(
+        f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING DEFAULTS) '
+        'PARTITION BY LIST ("is_archived")'
+    )
+    execute(f'CREATE TABLE "{ARCHIVE_TABLE}" PARTITION OF "{TABLE}" FOR VALUES IN (true)')
+
+    if strategy == "range":
+        execute(
+            f'CREATE TABLE "{HOT_TABLE}" PARTITION OF "{TABLE}" '
+            'FOR VALUES IN (false) PARTITION BY RANGE ("created_at")'
+        )
+        execute(f'CREATE TABLE "{HOT_TABLE}_default" PARTITION OF "{HOT_TABLE}" DEFAULT')
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT MIN("created_at") FROM "{OLD_TABLE}"')
+            oldest = cursor.fetchone()[0]
+        today = date.today()
+        start = _month_start(oldest.date() if oldest else today)
+        last = _month_start(today, settings.TODO_PARTITION_MONTHS_AHEAD)
+        while start <= last:
+            end = _month_start(start, 1)
+            execute(
+                f'CREATE TABLE "{HOT_TABLE}_p{start:%Y_%m}" PARTITION OF "{HOT_TABLE}" '
+                "FOR VALUES FROM (%s) TO (%s)",
+                [start.isoformat(), end.isoformat()],
+            )
+            start = end
+    else:
+        modulus = settings.TODO_HASH_PARTITIONS
+        execute(
+            f'CREATE TABLE "{HOT_TABLE}" PARTITION OF "{TABLE}" '
+            'FOR VALUES IN (false) PARTITION BY HASH ("owner_id")'
+        )
+        for remainder in range(modulus):
+            execute(
+                f'CREATE TABLE "{HOT_TABLE}_h{remainder}" PARTITION OF "{HOT_TABLE}" '
+                f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})"
+            )
+
+    execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD_TABLE}"')
+    execute(f'DROP TABLE "{OLD_TABLE}"')
+    _recreate_constraints_and_indexes(
+        schema_editor, Todo, user_table, f'"id", "is_archived", "{key}"'
+    )
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone() is None:
+            return
+
+    Todo = apps.get_model("dashboard", "Todo")
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+
+    execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+    execute(f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING DEFAULTS)')
+    execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD_TABLE}"')
+    execute(f'DROP TABLE "{OLD_TABLE}" CASCADE')
+    _recreate_constraints_and_indexes(schema_editor, Todo, user_table, '"id"')
+
+
+class Migration(migrations.Migration):
+    # Copying rows and swapping tables must happen atomically
+    atomic = True
+
+    dependencies = [
+        ("dashboard", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
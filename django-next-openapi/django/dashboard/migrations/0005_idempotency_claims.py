@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-19 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_idempotency'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='idempotencyrecord',
+            name='cookies',
+        ),
+        migrations.AlterField(
+            model_name='idempotencyrecord',
+            name='content',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AlterField(
+            model_name='idempotencyrecord',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='idempotencyrecord',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='idempotencyrecord',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
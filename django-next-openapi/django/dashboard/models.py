@@ -1,8 +1,13 @@
 # dashboard/models.py
 import uuid
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, transaction
+from django.db.models import Count, F, Func, Max, Q, Value
+from django.db.models.functions import Cast, JSONObject
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
+from dashboard.signals import outbox_published
 
 def generate_cuid() -> str:
     return str(uuid.uuid4())
@@ -10,7 +15,108 @@ def generate_cuid() -> str:
 def generate_short_hex() -> str:
     return uuid.uuid4().hex[:8]
 
-class CustomUserManager(BaseUserManager):
+class _UUIDText(Func):
+    """A UUID column as its canonical text form (SQLite stores 32 bare hex digits)."""
+    template = "CAST(%(expressions)s AS text)"
+    output_field = models.CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        template = "||'-'||".join(
+            f"substr(%(expressions)s, {start}, {length})"
+            for start, length in ((1, 8), (9, 4), (13, 4), (17, 4), (21, 12))
+        )
+        return self.as_sql(compiler, connection, template=f"lower({template})", **extra_context)
+
+
+class _JSONBool(Func):
+    """A boolean column as a JSON boolean inside JSONObject (SQLite would give 0/1)."""
+    template = "%(expressions)s"
+    output_field = models.BooleanField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        template = "json(CASE WHEN %(expressions)s THEN 'true' ELSE 'false' END)"
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+
+class OutboxMixin:
+    """
+    Models whose changes are published to the outbox. `outbox_payload_fields`
+    are the attributes every event carries; the payload is built the same way
+    from an instance (outbox_payload) and in SQL (outbox_payload_expression).
+    """
+    outbox_aggregate = None
+    outbox_payload_fields = ()
+
+    def outbox_payload(self):
+        return {name: getattr(self, name) for name in self.outbox_payload_fields}
+
+    @classmethod
+    def _outbox_text(cls, name):
+        if isinstance(cls._meta.get_field(name), models.UUIDField):
+            return _UUIDText(name)
+        return Cast(name, models.CharField())
+
+    @classmethod
+    def outbox_id_expression(cls):
+        return cls._outbox_text(cls._meta.pk.name)
+
+    @classmethod
+    def outbox_payload_expression(cls):
+        values = {}
+        for name in cls.outbox_payload_fields:
+            field = cls._meta.get_field(name)
+            if isinstance(field, models.UUIDField):
+                values[name] = _UUIDText(name)
+            elif isinstance(field, models.BooleanField):
+                values[name] = _JSONBool(name)
+            else:
+                values[name] = F(name)
+        return JSONObject(**values)
+
+
+def _update_with_events(queryset, write):
+    """
+    Run `write(chunk)` over `queryset` in pk-ordered chunks of
+    OUTBOX_WRITE_CHUNK_SIZE rows and record an `<aggregate>.updated` event
+    per row. Each chunk is one pk SELECT, the write and one INSERT ... SELECT
+    of its events, so memory stays bounded however many rows match.
+    Returns the summed results of write().
+    """
+    model = queryset.model
+    size = settings.OUTBOX_WRITE_CHUNK_SIZE
+    key_fields = list(dict.fromkeys(("id", *model.outbox_key_fields)))
+    rows, chunks, announced, last_pk = 0, 0, None, None
+    with transaction.atomic(using=queryset.db):
+        while True:
+            remaining = queryset.order_by("pk")
+            if last_pk is not None:
+                remaining = remaining.filter(pk__gt=last_pk)
+            keys = list(remaining.values(*key_fields)[:size])
+            if not keys:
+                break
+            pks = [key["id"] for key in keys]
+            rows += write(queryset.filter(pk__in=pks))
+            # Events carry the rows' new state, whether or not they still match
+            OutboxEvent.objects.publish_rows(
+                "updated", model._default_manager.using(queryset.db).filter(pk__in=pks)
+            )
+            # Receivers get the rows of a single chunk; beyond that, too many to list
+            announced = keys if chunks == 0 else None
+            chunks += 1
+            last_pk = pks[-1]
+        if chunks:
+            OutboxEvent.objects.announce(model, announced)
+    return rows
+
+
+class OutboxQuerySet(models.QuerySet):
+    """Records an `<aggregate>.updated` outbox event per row for set-based updates."""
+
+    def update(self, **kwargs):
+        return _update_with_events(self, lambda chunk: super(OutboxQuerySet, chunk).update(**kwargs))
+
+
+class CustomUserManager(BaseUserManager.from_queryset(OutboxQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("The Email field must be set.")
@@ -34,7 +140,7 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(email, password=password, **extra_fields)
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(OutboxMixin, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True, blank=False)
     phone = models.CharField(max_length=50, unique=True, null=True, blank=True)
     avatar = models.URLField(null=True, blank=True)
@@ -62,11 +168,140 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="user_created_at_idx"),
+            # LIKE 'prefix%' for admin search (ignored outside PostgreSQL)
+            models.Index(fields=["email"], opclasses=["varchar_pattern_ops"], name="user_email_prefix_idx"),
+        ]
+
+    outbox_aggregate = "user"
+    outbox_payload_fields = ("id", "email", "is_active", "is_banned", "is_email_verified")
+    # What outbox_published receivers may rely on in each payload
+    outbox_key_fields = ("id",)
+
     def __str__(self):
         return self.email or str(self.id)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            # Logins only touch last_login; that is not a change worth an event
+            if update_fields is None or set(update_fields) - {"last_login"}:
+                OutboxEvent.objects.publish("created" if adding else "updated", [self], dedup=adding)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            # Locked, so of two concurrent deletes only the one that finds the row announces it
+            exists = User.objects.select_for_update().filter(pk=self.pk).exists()
+            if exists:
+                OutboxEvent.objects.publish("deleted", [self])
+            return super().delete(*args, **kwargs)
+
+    @property
+    def cached_groups(self):
+        """The user's groups, served from the shared permission cache."""
+        from django.contrib.auth.models import Group
+        from dashboard.perm_cache import get_cached_access
+
+        return [Group(id=pk, name=name) for pk, name in get_cached_access(self)["groups"]]
+
+
+class TodoQuerySet(models.QuerySet):
+    """
+    Keeps TodoStats and the outbox in step with set-based writes.
+    Single-instance saves and deletes are handled on the model; Model.save()
+    does not go through QuerySet.update(), so nothing is counted twice.
+    """
+
+    def _owner_counts(self):
+        rows = (
+            self.order_by()
+            .values("owner")
+            .annotate(total=Count("pk"), completed=Count("pk", filter=Q(is_complete=True)))
+        )
+        return {row["owner"]: (row["total"], row["completed"]) for row in rows}
+
+    def _owner_ids(self):
+        return set(self.order_by().values_list("owner", flat=True).distinct())
 
-class Todo(models.Model):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            owners = {obj.owner_id for obj in objs}
+            if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+                # Can't tell which rows were actually inserted
+                TodoStats.objects.reconcile(owners)
+            else:
+                deltas = {}
+                for obj in objs:
+                    total, completed = deltas.get(obj.owner_id, (0, 0))
+                    deltas[obj.owner_id] = (total + 1, completed + int(obj.is_complete))
+                TodoStats.objects.apply_deltas(deltas)
+            # dedup keeps rows skipped by ignore_conflicts from being announced twice
+            OutboxEvent.objects.publish("created", objs, dedup=True, using=self.db)
+        return created
+
+    def unarchived(self):
+        """Only hot rows; lets PostgreSQL prune the archive partition."""
+        return self.filter(is_archived=False)
+
+    def update(self, **kwargs):
+        if set(kwargs) <= {"is_archived", "updated_at"} and "is_archived" in kwargs:
+            # Archival moves rows between partitions; it is not user activity
+            # and counters include archived todos, so stats stay untouched.
+            # Cached todo lists still have to drop the archived rows.
+            from dashboard.response_cache import invalidate_users
+
+            invalidate_users(self._owner_ids())
+            return super().update(**kwargs)
+
+        return _update_with_events(self, lambda chunk: chunk._update_with_stats(kwargs))
+
+    def _update_with_stats(self, kwargs):
+        value = kwargs.get("is_complete")
+        if "owner" in kwargs or "owner_id" in kwargs or (
+            "is_complete" in kwargs and not isinstance(value, bool)
+        ):
+            # Ownership moves and expressions (e.g. from bulk_update) are recounted
+            owners = self._owner_ids()
+            rows = super().update(**kwargs)
+            new_owner = kwargs.get("owner_id", kwargs.get("owner"))
+            if new_owner is not None:
+                owners.add(getattr(new_owner, "pk", new_owner))
+            TodoStats.objects.reconcile(owners)
+            return rows
+
+        if "is_complete" in kwargs:
+            flipping = self.exclude(is_complete=value)._owner_counts()
+            sign = 1 if value else -1
+            deltas = {owner: (0, sign * total) for owner, (total, _) in flipping.items()}
+            owners = self._owner_ids()
+        else:
+            deltas, owners = {}, self._owner_ids()
+        rows = super().update(**kwargs)
+        for owner in owners:
+            deltas.setdefault(owner, (0, 0))
+        TodoStats.objects.apply_deltas(deltas)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            counts = self._owner_counts()
+            # Written from the rows themselves, before they are gone
+            OutboxEvent.objects.publish_rows("deleted", self)
+            OutboxEvent.objects.announce(self.model, [{"owner_id": owner} for owner in counts])
+            result = super().delete()
+            TodoStats.objects.apply_deltas(
+                {owner: (-total, -completed) for owner, (total, completed) in counts.items()}
+            )
+        return result
+
+
+class Todo(OutboxMixin, models.Model):
     """
     Simple Todo model linked to your custom User model.
     """
@@ -79,11 +314,285 @@ class Todo(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, default="")
     is_complete = models.BooleanField(default=False)
+    # Completed todos are moved to the archive (partition) by
+    # dashboard.tasks.maintain_todo_partitions; see dashboard/partitions.py
+    is_archived = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TodoQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["owner", "created_at"], name="todo_owner_created_idx"),
+            models.Index(fields=["owner", "is_complete", "created_at"], name="todo_owner_complete_idx"),
+            models.Index(
+                fields=["updated_at"],
+                condition=Q(is_complete=True, is_archived=False),
+                name="todo_archivable_idx",
+            ),
+        ]
+
+    outbox_aggregate = "todo"
+    outbox_payload_fields = ("id", "owner_id", "title", "is_complete", "is_archived")
+    # What outbox_published receivers may rely on in each payload
+    outbox_key_fields = ("owner_id",)
+
+    def __str__(self):
+        return f"{self.title} ({'done' if self.is_complete else 'open'})"
+
+    def _lock_stored_is_complete(self):
+        """
+        Lock the row and return its stored is_complete (None if it is gone).
+        Concurrent saves and deletes of one todo then compute their counter
+        deltas one after another, each from the state the previous one left.
+        """
+        return (
+            Todo.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("is_complete", flat=True)
+            .first()
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get("using")):
+            tracked = not adding and (update_fields is None or "is_complete" in update_fields)
+            before = self._lock_stored_is_complete() if tracked else None
+            super().save(*args, **kwargs)
+
+            # A save of a stale instance whose row is gone inserts it again
+            created = adding or (tracked and before is None)
+            if created:
+                delta = (1, int(self.is_complete))
+            elif tracked:
+                delta = (0, int(self.is_complete) - int(before))
+            else:
+                delta = (0, 0)
+            TodoStats.objects.apply_deltas({self.owner_id: delta})
+            OutboxEvent.objects.publish("created" if created else "updated", [self], dedup=created)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            stored = self._lock_stored_is_complete()
+            if stored is not None:
+                OutboxEvent.objects.publish("deleted", [self])
+            result = super().delete(*args, **kwargs)
+            if stored is not None:
+                TodoStats.objects.apply_deltas({self.owner_id: (-1, -int(stored))})
+        return result
+
+
+class TodoStatsManager(models.Manager):
+    def apply_deltas(self, deltas):
+        """
+        Apply {owner_id: (total_delta, completed_delta)} with F() updates so
+        concurrent writers don't lose increments. Users without a row yet are
+        counted from scratch (the todo write is already visible to us).
+        """
+        now = timezone.now()
+        missing = []
+        for owner_id, (total, completed) in deltas.items():
+            updated = self.filter(user_id=owner_id).update(
+                total=F("total") + total,
+                completed=F("completed") + completed,
+                last_activity_at=now,
+            )
+            if not updated:
+                missing.append(owner_id)
+        if missing:
+            self.reconcile(missing, last_activity_at=now)
+
+    def reconcile(self, user_ids, last_activity_at=None):
+        """
+        Recount the given users from the todo table and repair any drift.
+        Returns the number of rows created or corrected.
+        """
+        user_ids = list(user_ids)
+        rows = (
+            Todo.objects.filter(owner_id__in=user_ids)
+            .order_by()
+            .values("owner")
+            .annotate(
+                total=Count("pk"),
+                completed=Count("pk", filter=Q(is_complete=True)),
+                last=Max("updated_at"),
+            )
+        )
+        counts = {row["owner"]: row for row in rows}
+        existing = {stats.user_id: stats for stats in self.filter(user_id__in=user_ids)}
+
+        to_create, to_update = [], []
+        for user_id in user_ids:
+            row = counts.get(user_id, {"total": 0, "completed": 0, "last": None})
+            stats = existing.get(user_id)
+            if stats is None:
+                to_create.append(self.model(
+                    user_id=user_id,
+                    total=row["total"],
+                    completed=row["completed"],
+                    last_activity_at=last_activity_at or row["last"],
+                ))
+            elif (stats.total, stats.completed) != (row["total"], row["completed"]):
+                stats.total, stats.completed = row["total"], row["completed"]
+                to_update.append(stats)
+
+        self.bulk_create(to_create, ignore_conflicts=True)
+        self.bulk_update(to_update, ["total", "completed"])
+        return len(to_create) + len(to_update)
+
+
+class TodoStats(models.Model):
+    """
+    Denormalized per-user todo counters, maintained transactionally by Todo
+    writes so the dashboard can read them in O(1).
+    Repair drift with `manage.py reconcile_todo_stats`.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="todo_stats",
+    )
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TodoStatsManager()
+
+    @property
+    def open(self):
+        return self.total - self.completed
+
+    def __str__(self):
+        return f"{self.user_id}: {self.completed}/{self.total}"
+
+
+class OutboxEventManager(models.Manager):
+    def publish(self, action, instances, dedup=False, using=None):
+        """
+        Record an `<aggregate>.<action>` event for each instance with a single
+        INSERT. Call it inside the transaction that writes the instances, so
+        the events commit or roll back together with the change.
+
+        With `dedup`, events get a `<type>:<id>` key and repeats are dropped
+        (e.g. "created" for rows a bulk_create skipped as conflicts).
+        """
+        events, model = [], None
+        for instance in instances:
+            model = type(instance)
+            event_type = f"{instance.outbox_aggregate}.{action}"
+            events.append(self.model(
+                aggregate_type=instance.outbox_aggregate,
+                aggregate_id=str(instance.pk),
+                event_type=event_type,
+                payload=instance.outbox_payload(),
+                dedup_key=f"{event_type}:{instance.pk}" if dedup else None,
+            ))
+        if events:
+            self.using(using or self.db).bulk_create(events, ignore_conflicts=dedup)
+            self.announce(model, [event.payload for event in events])
+
+    def publish_rows(self, action, queryset):
+        """
+        Record an `<aggregate>.<action>` event for every row of `queryset`
+        with one INSERT ... SELECT, so the rows are never loaded. Payloads
+        match Model.outbox_payload(). Receivers are not notified; see announce().
+        """
+        model = queryset.model
+        now = timezone.now()
+        select = queryset.order_by("pk").annotate(
+            outbox_aggregate_type=Value(model.outbox_aggregate),
+            outbox_aggregate_id=model.outbox_id_expression(),
+            outbox_event_type=Value(f"{model.outbox_aggregate}.{action}"),
+            outbox_payload=model.outbox_payload_expression(),
+            outbox_created_at=Value(now, output_field=models.DateTimeField()),
+            outbox_available_at=Value(now, output_field=models.DateTimeField()),
+            outbox_attempts=Value(0),
+            outbox_last_error=Value(""),
+        ).values_list(
+            "outbox_aggregate_type", "outbox_aggregate_id", "outbox_event_type", "outbox_payload",
+            "outbox_created_at", "outbox_available_at", "outbox_attempts", "outbox_last_error",
+        )
+        connection = connections[queryset.db]
+        sql, params = select.query.get_compiler(connection=connection).as_sql()
+        columns = ", ".join(connection.ops.quote_name(self.model._meta.get_field(name).column) for name in (
+            "aggregate_type", "aggregate_id", "event_type", "payload",
+            "created_at", "available_at", "attempts", "last_error",
+        ))
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table} ({columns}) {sql}", params)
+
+    def announce(self, model, payloads):
+        """
+        Send outbox_published for events just written for `model` rows.
+        `payloads` are dicts with at least the model's outbox_key_fields for
+        the affected rows, or None when there were too many rows to list.
+        """
+        outbox_published.send(sender=model, aggregate_type=model.outbox_aggregate, payloads=payloads)
+
+    def pending(self):
+        return self.filter(dispatched_at__isnull=True, failed_at__isnull=True)
+
+
+class OutboxEvent(models.Model):
+    """
+    Transactional outbox: change events for Todo and User, written in the
+    same transaction as the change and delivered afterwards by
+    dashboard.outbox.relay_outbox (Celery beat or `manage.py relay_outbox`).
+    """
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=64)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Retries are pushed back with exponential backoff
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxEventManager()
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=Q(dispatched_at__isnull=True, failed_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+            models.Index(fields=["aggregate_type", "aggregate_id", "id"], name="outbox_aggregate_idx"),
+            models.Index(
+                fields=["dispatched_at"],
+                condition=Q(dispatched_at__isnull=False),
+                name="outbox_dispatched_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.event_type} {self.aggregate_id}"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Claim on, then stored first response for, an Idempotency-Key
+    (dashboard.idempotency). The cache holds the same entry; this row
+    survives cache eviction until `expires_at`, after which the
+    purge_idempotency_records task removes it.
+    """
+    key = models.CharField(max_length=64, unique=True)  # digest of view, user and client key
+    fingerprint = models.CharField(max_length=64, blank=True)  # HMAC of the request body; claim token while pending
+    status_code = models.PositiveSmallIntegerField(null=True)  # null while the first request runs
+    content_type = models.CharField(max_length=255, blank=True)
+    content = models.BinaryField(default=b"")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
 
     def __str__(self):
-        return f"{self.title} ({'done' if self.is_complete else 'open'})"
\ No newline at end of file
+        return f"{self.key[:12]} {self.status_code}"
@@ -0,0 +1,228 @@
+# dashboard/outbox.py
+"""
+Relay for the transactional outbox (dashboard.models.OutboxEvent).
+
+Todo and User writes insert their change events in the same transaction as
+the change, so the request path pays for one local INSERT and rolled-back
+changes never produce events. `relay_outbox()` delivers committed events
+to the handlers configured in OUTBOX_HANDLERS:
+
+- in id order per aggregate; an event that fails holds back the later
+  events of the same todo/user until it is delivered or given up on;
+- consecutive `*.updated` events of one aggregate in a batch are coalesced
+  into the latest (each payload carries the full state);
+- in bounded batches, one relay at a time (a PostgreSQL advisory lock), with
+  exponential backoff per failing event and a dead-letter state after
+  OUTBOX_MAX_ATTEMPTS.
+
+Delivery is at-least-once: handlers should be idempotent on `event.pk`.
+"""
+import logging
+from datetime import timedelta
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from dashboard.models import OutboxEvent
+
+logger = logging.getLogger("dashboard")
+
+# Arbitrary constant identifying the relay's advisory lock
+RELAY_LOCK_ID = 0x0D0B0C5
+
+
+def log_event(event):
+    """Example handler: write the event to the dashboard log."""
+    logger.info("Outbox event #%s %s %s", event.pk, event.event_type, event.payload)
+
+
+def send_welcome_email(event):
+    """
+    Opt-in user.created handler: queue a welcome mail. The task is queued
+    only once the relay batch commits, and at most once per event id, so
+    retried or rolled-back deliveries don't send duplicates.
+    """
+    if not settings.EMAIL_HOST:
+        logger.info("Email not configured, skipping welcome mail for user %s", event.aggregate_id)
+        return
+    from dashboard.tasks import send_celery_email
+
+    def enqueue():
+        guard = f"outbox:welcome:{event.pk}"
+        if cache.add(guard, 1, timeout=settings.OUTBOX_RETENTION_DAYS * 86400):
+            send_celery_email.delay(event.payload["email"], "Welcome!", "Your account has been created.")
+
+    transaction.on_commit(enqueue)
+
+
+def get_handlers():
+    """{pattern: [callable, ...]} from OUTBOX_HANDLERS (fnmatch patterns)."""
+    return {
+        pattern: [import_string(path) for path in paths]
+        for pattern, paths in settings.OUTBOX_HANDLERS.items()
+    }
+
+
+def _handlers_for(handlers, event_type):
+    return [
+        handler
+        for pattern, callables in handlers.items()
+        if fnmatchcase(event_type, pattern)
+        for handler in callables
+    ]
+
+
+def _acquire_relay_lock():
+    if connection.vendor != "postgresql":
+        return True
+    with connection.cursor() as cursor:
+        # Released automatically when the batch transaction ends
+        cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [RELAY_LOCK_ID])
+        return cursor.fetchone()[0]
+
+
+def _backoff(attempts):
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _superseded(batch):
+    """Ids of `*.updated` events directly followed by another update of the same aggregate."""
+    superseded = set()
+    latest = {}
+    for event in batch:
+        key = (event.aggregate_type, event.aggregate_id)
+        previous = latest.get(key)
+        if (
+            previous is not None
+            and previous.event_type == event.event_type
+            and event.event_type.endswith(".updated")
+        ):
+            superseded.add(previous.pk)
+        latest[key] = event
+    return superseded
+
+
+def _deliver(event, handlers):
+    for handler in _handlers_for(handlers, event.event_type):
+        # Savepoint, so a handler's database error doesn't abort the batch
+        with transaction.atomic():
+            handler(event)
+
+
+def _relay_batch(handlers, after_id, batch_size, stats):
+    """Deliver one batch; returns the last id seen, or None when done."""
+    with transaction.atomic():
+        if not _acquire_relay_lock():
+            stats["locked"] = True
+            return None
+
+        now = timezone.now()
+        batch = list(
+            OutboxEvent.objects.pending()
+            .filter(id__gt=after_id, available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if not batch:
+            return None
+
+        # Aggregates with an older event still waiting for a retry stay blocked
+        blocked = set(
+            OutboxEvent.objects.pending()
+            .filter(
+                id__lt=batch[-1].pk,
+                available_at__gt=now,
+                aggregate_id__in={event.aggregate_id for event in batch},
+            )
+            .values_list("aggregate_type", "aggregate_id")
+        )
+        superseded = _superseded(batch)
+        dispatched, retried = [], []
+
+        for event in batch:
+            key = (event.aggregate_type, event.aggregate_id)
+            if key in blocked:
+                stats["blocked"] += 1
+                continue
+            if event.pk in superseded:
+                event.dispatched_at = now
+                dispatched.append(event)
+                stats["coalesced"] += 1
+                continue
+            try:
+                _deliver(event, handlers)
+            except Exception as exc:
+                event.attempts += 1
+                event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    event.failed_at = now
+                    stats["failed"] += 1
+                    logger.error("Outbox event #%s %s given up after %s attempts: %s",
+                                 event.pk, event.event_type, event.attempts, event.last_error)
+                else:
+                    event.available_at = now + _backoff(event.attempts)
+                    blocked.add(key)
+                    stats["retried"] += 1
+                    logger.warning("Outbox event #%s %s failed (attempt %s): %s",
+                                   event.pk, event.event_type, event.attempts, event.last_error)
+                retried.append(event)
+                continue
+            event.dispatched_at = now
+            dispatched.append(event)
+            stats["dispatched"] += 1
+
+        OutboxEvent.objects.bulk_update(dispatched, ["dispatched_at"])
+        OutboxEvent.objects.bulk_update(
+            retried, ["attempts", "last_error", "available_at", "failed_at"]
+        )
+        return batch[-1].pk
+
+
+def relay_outbox(batch_size=None, max_batches=None):
+    """
+    Deliver up to `max_batches` batches of pending events. Bounded so a
+    large backlog is worked off over several runs instead of one long one.
+    Returns counters for the run.
+    """
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+    if max_batches is None:
+        max_batches = settings.OUTBOX_MAX_BATCHES
+
+    handlers = get_handlers()
+    stats = {"dispatched": 0, "coalesced": 0, "retried": 0, "failed": 0, "blocked": 0, "locked": False}
+    after_id = 0
+    for _ in range(max_batches):
+        after_id = _relay_batch(handlers, after_id, batch_size, stats)
+        if after_id is None:
+            break
+    else:
+        backlog = OutboxEvent.objects.pending().count()
+        stats["backlog"] = backlog
+        if backlog > settings.OUTBOX_BACKLOG_WARNING:
+            logger.warning("Outbox backlog at %s events", backlog)
+    return stats
+
+
+def purge_dispatched(older_than_days=None, batch_size=None):
+    """Delete delivered events older than the retention period, in batches."""
+    if older_than_days is None:
+        older_than_days = settings.OUTBOX_RETENTION_DAYS
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    purged = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(dispatched_at__lt=cutoff)
+            .order_by()
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return purged
+        purged += OutboxEvent.objects.filter(pk__in=ids).delete()[0]
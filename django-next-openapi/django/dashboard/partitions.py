@@ -0,0 +1,113 @@
+# dashboard/partitions.py
+"""
+Runtime maintenance for the (optionally) partitioned todo table.
+
+With TODO_PARTITIONING set, migration 0002 turns dashboard_todo into:
+
+    dashboard_todo                  PARTITION BY LIST (is_archived)
+      dashboard_todo_archive        FOR VALUES IN (true)
+      dashboard_todo_hot            FOR VALUES IN (false)
+        "range": PARTITION BY RANGE (created_at), one partition per month
+                 plus dashboard_todo_hot_default
+        "hash":  PARTITION BY HASH (owner_id), TODO_HASH_PARTITIONS parts
+
+Archiving is a plain UPDATE of is_archived; PostgreSQL moves the row into
+the archive partition. Without partitioning the same flag keeps archived
+rows out of the hot indexes through the `todo_archivable_idx` partial
+index and the views' unarchived() filter.
+"""
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from dashboard.models import Todo
+
+logger = logging.getLogger("dashboard")
+
+HOT_TABLE = "dashboard_todo_hot"
+
+
+def hot_partition_strategy():
+    """Return "range", "hash" or None if the hot table is not partitioned."""
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT partstrat FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [HOT_TABLE],
+        )
+        row = cursor.fetchone()
+    return {"r": "range", "h": "hash"}.get(row[0]) if row else None
+
+
+def _month_start(day, offset=0):
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def month_partition_name(start):
+    return f"{HOT_TABLE}_p{start:%Y_%m}"
+
+
+def ensure_future_partitions(months_ahead=None):
+    """
+    Create monthly range partitions from the current month up to
+    `months_ahead` months out. Returns the names of partitions created.
+    """
+    if hot_partition_strategy() != "range":
+        return []
+    if months_ahead is None:
+        months_ahead = settings.TODO_PARTITION_MONTHS_AHEAD
+
+    today = timezone.now().date()
+    created = []
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        name = month_partition_name(start)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            try:
+                with transaction.atomic():
+                    cursor.execute(
+                        f'CREATE TABLE "{name}" PARTITION OF "{HOT_TABLE}" '
+                        "FOR VALUES FROM (%s) TO (%s)",
+                        [start.isoformat(), end.isoformat()],
+                    )
+            except Exception:
+                # Typically rows for that month already sit in the default partition
+                logger.exception("Could not create todo partition %s", name)
+                continue
+        created.append(name)
+    return created
+
+
+def archive_completed_todos(older_than_days=None, batch_size=None):
+    """
+    Move completed todos not touched for `older_than_days` into the archive,
+    in short batches so locks stay small. Returns the number archived.
+    """
+    if older_than_days is None:
+        older_than_days = settings.TODO_ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.TODO_ARCHIVE_BATCH_SIZE
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    archived = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Todo.objects.filter(is_complete=True, is_archived=False, updated_at__lt=cutoff)
+                .order_by()
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            archived += Todo.objects.filter(pk__in=ids).update(is_archived=True)
+    if archived:
+        logger.info("Archived %s completed todos older than %s days", archived, older_than_days)
+    return archived
@@ -0,0 +1,200 @@
+# dashboard/perm_cache.py
+"""
+Versioned, cross-process cache of each user's groups and permissions.
+
+Entries are keyed by (user id, user version, global version). Changing a
+user's groups or direct permissions bumps that user's version; changing a
+group's permissions (or renaming or deleting a group) bumps the global
+version. Old entries are never deleted, they just stop being addressed and
+expire.
+
+The versions only invalidate other processes if they live in a shared
+cache, so caching is off (PERMISSION_CACHE_ENABLED) unless one is
+configured; lookups then hit the database once per request, like
+ModelBackend.
+"""
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+GLOBAL_VERSION_KEY = "perms:v:global"
+HITS_KEY = "perms:stats:hits"
+MISSES_KEY = "perms:stats:misses"
+# Hit/miss counters are buffered per process and flushed every N lookups
+STATS_FLUSH_EVERY = 100
+
+_stats_lock = Lock()
+_pending = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    return caches[settings.PERMISSION_CACHE_ALIAS]
+
+
+def _user_version_key(user_id):
+    return f"perms:v:user:{user_id}"
+
+
+def _bump(key):
+    cache = _cache()
+    # add() is a no-op when the key exists, so the first bump starts at 2
+    cache.add(key, 1, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def invalidate_user(user_id):
+    # Bump after commit so no other process re-caches the old rows
+    transaction.on_commit(lambda: _bump(_user_version_key(user_id)))
+
+
+def invalidate_all():
+    transaction.on_commit(lambda: _bump(GLOBAL_VERSION_KEY))
+
+
+def _record(hit):
+    with _stats_lock:
+        _pending["hits" if hit else "misses"] += 1
+        if _pending["hits"] + _pending["misses"] < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_pending)
+        _pending["hits"] = _pending["misses"] = 0
+    flush_stats(pending)
+
+
+def flush_stats(pending=None):
+    if pending is None:
+        with _stats_lock:
+            pending = dict(_pending)
+            _pending["hits"] = _pending["misses"] = 0
+    cache = _cache()
+    for key, count in ((HITS_KEY, pending["hits"]), (MISSES_KEY, pending["misses"])):
+        if not count:
+            continue
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, timeout=None)
+
+
+def get_stats():
+    """Return shared hit/miss totals (including this process's unflushed counts)."""
+    flush_stats()
+    cache = _cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "ratio": hits / total if total else 0.0}
+
+
+def current_versions(user_id):
+    """(user version, global version) addressing the user's cached entry."""
+    user_key = _user_version_key(user_id)
+    versions = _cache().get_many([user_key, GLOBAL_VERSION_KEY])
+    return versions.get(user_key, 1), versions.get(GLOBAL_VERSION_KEY, 1)
+
+
+def _load(user):
+    backend = ModelBackend()
+    return {
+        "user": sorted(backend._get_permissions(user, None, "user")),
+        "group": sorted(backend._get_permissions(user, None, "group")),
+        "groups": list(user.groups.order_by("name").values_list("id", "name")),
+    }
+
+
+def get_cached_access(user):
+    """
+    Return {"user": [...], "group": [...], "groups": [(id, name), ...]} for
+    `user`, memoized on the instance for the rest of the request.
+    """
+    cached = getattr(user, "_access_cache", None)
+    if cached is not None:
+        return cached
+
+    if not settings.PERMISSION_CACHE_ENABLED:
+        user._access_cache = _load(user)
+        return user._access_cache
+
+    cache = _cache()
+    user_version, global_version = current_versions(user.pk)
+    key = "perms:{}:{}:{}:{}".format(user.pk, user_version, global_version, int(user.is_superuser))
+
+    data = cache.get(key)
+    _record(hit=data is not None)
+    if data is None:
+        data = _load(user)
+        cache.set(key, data, timeout=settings.PERMISSION_CACHE_TIMEOUT)
+
+    user._access_cache = data
+    return data
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose permission lookups are served from get_cached_access()."""
+
+    def _cached(self, user_obj, obj, kind):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_cached_access(user_obj)[kind])
+
+    def get_user_permissions(self, user_obj, obj=None):
+        return self._cached(user_obj, obj, "user")
+
+    def get_group_permissions(self, user_obj, obj=None):
+        return self._cached(user_obj, obj, "group")
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            data = get_cached_access(user_obj)
+            user_obj._perm_cache = {*data["user"], *data["group"]}
+        return user_obj._perm_cache
+
+
+def _user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    if not reverse:
+        if action != "pre_clear":
+            invalidate_user(instance.pk)
+    elif action == "pre_clear":
+        # group.user_set.clear(): pk_set is empty, so capture members first
+        for user_id in instance.user_set.values_list("pk", flat=True):
+            invalidate_user(user_id)
+    elif action != "post_clear":
+        for user_id in pk_set or ():
+            invalidate_user(user_id)
+
+
+def _global_changed(sender, action=None, **kwargs):
+    if action is None or action in ("post_add", "post_remove", "post_clear"):
+        invalidate_all()
+
+
+def _group_saved(sender, created, **kwargs):
+    # Cached entries carry group names; a new group has no members yet
+    if not created:
+        invalidate_all()
+
+
+def connect_signals():
+    User = get_user_model()
+    m2m_changed.connect(_user_groups_changed, sender=User.groups.through,
+                        dispatch_uid="perm_cache_user_groups")
+    m2m_changed.connect(_user_groups_changed, sender=User.user_permissions.through,
+                        dispatch_uid="perm_cache_user_permissions")
+    m2m_changed.connect(_global_changed, sender=Group.permissions.through,
+                        dispatch_uid="perm_cache_group_permissions")
+    post_delete.connect(_global_changed, sender=Group, dispatch_uid="perm_cache_group_delete")
+    post_save.connect(_group_saved, sender=Group, dispatch_uid="perm_cache_group_save")
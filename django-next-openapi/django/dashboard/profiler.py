@@ -0,0 +1,182 @@
+# dashboard/profiler.py
+"""
+On-demand sampling profiler for live requests.
+
+ProfilingMiddleware (dashboard.middleware) is only installed when
+PROFILER_ENABLED is set; otherwise it removes itself at startup and costs
+nothing. Once installed, a request is profiled when:
+
+- a staff user sends the `X-Profile: 1` header, or
+- sampling is switched on, from settings (PROFILER_SAMPLE_PERCENT,
+  PROFILER_ROUTES) or from the admin page (/admin/profiler/), for a
+  percentage of requests and/or specific routes (URL names or path prefixes).
+
+A profiled request gets a sampler thread that records the request thread's
+stack every PROFILER_INTERVAL_MS. Stacks are counted per view with atomic
+per-stack counters (dashboard.counters) and exported in the collapsed
+"frame;frame;frame count" format read by flamegraph.pl, speedscope and
+similar tools. The admin toggle and the profiles must reach every worker,
+so PROFILER_ENABLED needs a shared cache (see dashboard.checks).
+"""
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from dashboard import counters
+
+CONFIG_KEY = "profiler:config"
+PROFILES_KEY = "profiler:views"
+VIEW_COUNTERS = (":requests", ":samples")
+# Views, and distinct stacks per view, listed in the profiles; beyond that
+# samples still count towards their view's totals
+MAX_VIEWS = 500
+MAX_STACKS = 5000
+HEADER = "HTTP_X_PROFILE"
+# The admin toggle is re-read from the shared cache at most this often
+CONFIG_REFRESH_SECONDS = 5
+
+_config = {"value": None, "expires": 0.0}
+_prefixes = sorted({os.path.dirname(os.__file__), *sys.path}, key=len, reverse=True)
+
+
+def _short_path(filename):
+    for prefix in _prefixes:
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def fold_stack(frame):
+    """Collapse a frame's stack into "outer;...;inner" (root first)."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def start_sampler():
+    sampler = Sampler(threading.get_ident(), settings.PROFILER_INTERVAL_MS / 1000)
+    sampler.start()
+    return sampler
+
+
+def get_config():
+    """Active sampling config: the admin toggle if set, else the settings."""
+    now = time.monotonic()
+    if _config["expires"] <= now:
+        _config["value"] = cache.get(CONFIG_KEY)
+        _config["expires"] = now + CONFIG_REFRESH_SECONDS
+    if _config["value"] is not None:
+        return _config["value"]
+    return {"percent": settings.PROFILER_SAMPLE_PERCENT, "routes": list(settings.PROFILER_ROUTES)}
+
+
+def set_config(percent, routes, minutes):
+    """Switch sampling on from the admin; it turns itself off after `minutes`."""
+    cache.set(CONFIG_KEY, {"percent": percent, "routes": routes}, timeout=minutes * 60)
+    _config["expires"] = 0.0
+
+
+def clear_config():
+    cache.delete(CONFIG_KEY)
+    _config["expires"] = 0.0
+
+
+def should_sample(request):
+    config = get_config()
+    percent = config["percent"]
+    if config["routes"]:
+        match = request.resolver_match
+        names = {match.url_name, match.view_name} if match else set()
+        if not any(
+            route in names or (route.startswith("/") and request.path.startswith(route))
+            for route in config["routes"]
+        ):
+            return False
+        # A route on its own means every request to it
+        percent = percent or 100
+    return percent > 0 and random.random() * 100 < percent
+
+
+def _digest(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:12]
+
+
+def _stacks_registry(view_key):
+    return f"{view_key}:stacks"
+
+
+def record_profile(view_name, stacks):
+    view_key = f"{PROFILES_KEY}:{_digest(view_name)}"
+    counters.register(PROFILES_KEY, view_key, view_name, MAX_VIEWS)
+    counters.incr(view_key + ":requests")
+    counters.incr(view_key + ":samples", sum(stacks.values()))
+    registry = _stacks_registry(view_key)
+    for stack, count in stacks.items():
+        stack_key = f"{registry}:{_digest(stack)}"
+        counters.register(registry, stack_key, stack, MAX_STACKS)
+        counters.incr(stack_key + ":count", count)
+
+
+def get_profiles():
+    """{view name: {"requests", "samples", "stacks": {stack: count}}}."""
+    views = counters.registered(PROFILES_KEY, MAX_VIEWS)
+    totals = cache.get_many([key + suffix for key in views for suffix in VIEW_COUNTERS])
+    profiles = {}
+    for view_key, view_name in views.items():
+        stacks = counters.registered(_stacks_registry(view_key), MAX_STACKS)
+        counts = cache.get_many([key + ":count" for key in stacks])
+        profiles[view_name] = {
+            "requests": totals.get(view_key + ":requests", 0),
+            "samples": totals.get(view_key + ":samples", 0),
+            "stacks": {stack: counts.get(key + ":count", 0) for key, stack in stacks.items()},
+        }
+    return profiles
+
+
+def reset_profiles():
+    for view_key in counters.registered(PROFILES_KEY, MAX_VIEWS):
+        counters.unregister(_stacks_registry(view_key), MAX_STACKS, (":count",))
+    counters.unregister(PROFILES_KEY, MAX_VIEWS, VIEW_COUNTERS)
+
+
+def collapsed(profiles, view_name=None):
+    """Collapsed-stack text, each stack rooted at its view name."""
+    lines = []
+    for name, profile in sorted(profiles.items()):
+        if view_name and name != view_name:
+            continue
+        for stack, count in sorted(profile["stacks"].items()):
+            lines.append(f"{name};{stack} {count}")
+    return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,172 @@
+# dashboard/querybudget.py
+"""
+Per-view statement timeouts and slow-query capture.
+
+QueryBudgetMiddleware (dashboard.middleware) installs a QueryBudget as a
+connection execute_wrapper for each request; BatchView narrows it to each
+sub-request's view with QueryBudget.for_view(). On PostgreSQL the view's
+budget is applied with `SET statement_timeout` right before its next query
+and reset afterwards. Every query slower than
+SLOW_QUERY_THRESHOLD_MS is logged on the `dashboard` logger and, with
+SLOW_QUERY_REPORT_ENABLED, counted towards a top-N report (see
+`manage.py slow_query_report`). The report lives in the default cache and
+is read from another process, so it needs a shared cache (CACHE_REDIS_URL).
+"""
+import hashlib
+import logging
+import re
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from dashboard import counters
+
+logger = logging.getLogger("dashboard")
+
+REPORT_KEY = "slowq:report"
+REPORT_COUNTERS = (":count", ":total_us", ":max_us")
+# Collapse "IN (%s, %s, %s)" so queries differing only in list length aggregate
+_PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+_WHITESPACE = re.compile(r"\s+")
+QUERY_CANCELED = "57014"
+TIMEOUT_DETAIL = "The request took too long to process. Please retry later."
+
+
+def normalize_sql(sql):
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_LIST.sub("%s, ...", sql)).strip()
+
+
+def fingerprint(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:12]
+
+
+def is_statement_timeout(exc):
+    """True if `exc` is PostgreSQL cancelling a query for statement_timeout."""
+    if not isinstance(exc, DatabaseError):
+        return False
+    return getattr(exc.__cause__, "pgcode", None) == QUERY_CANCELED
+
+
+def view_name(view_func):
+    view = getattr(view_func, "cls", view_func)
+    return f"{view.__module__}.{view.__qualname__}"
+
+
+def view_timeout(view_func, path, url_name):
+    """
+    Statement timeout (ms) for a view: its `statement_timeout` attribute,
+    else STATEMENT_TIMEOUTS[url name], else STATEMENT_TIMEOUT_MS. Admin and
+    static requests get 0, i.e. no limit.
+    """
+    if path.startswith("/admin") or path.startswith("/static"):
+        return 0
+    timeout = getattr(getattr(view_func, "cls", view_func), "statement_timeout", None)
+    if timeout is None:
+        timeout = settings.STATEMENT_TIMEOUTS.get(url_name, settings.STATEMENT_TIMEOUT_MS)
+    return timeout
+
+
+def record_slow_query(view_name, sql, params, duration_ms):
+    normalized = normalize_sql(sql)
+    sql_id = fingerprint(normalized)
+    # Params may hold personal data, so only a hash of them is kept
+    params_id = fingerprint(repr(params)) if params else ""
+
+    logger.warning(
+        "SLOW QUERY %.1fms view=%s sql_id=%s params=%s sql=%s",
+        duration_ms, view_name, sql_id, params_id, normalized[:1000],
+    )
+    if not settings.SLOW_QUERY_REPORT_ENABLED:
+        return
+
+    # Atomic counters per (view, query), so concurrent writers never
+    # overwrite each other's samples (dashboard.counters)
+    key = f"{REPORT_KEY}:{fingerprint(f'{view_name}:{sql_id}')}"
+    meta = {"view": view_name, "sql_id": sql_id, "sql": normalized[:1000]}
+    counters.register(REPORT_KEY, key, meta, settings.SLOW_QUERY_REPORT_SIZE)
+    duration_us = int(duration_ms * 1000)
+    counters.incr(key + ":count")
+    counters.incr(key + ":total_us", duration_us)
+    # The maximum can't be incremented; a concurrent larger sample may win or lose
+    if duration_us > cache.get(key + ":max_us", 0):
+        cache.set(key + ":max_us", duration_us, timeout=None)
+
+
+def slow_query_report(top=20):
+    """Aggregated slow queries, most total time first."""
+    entries = counters.registered(REPORT_KEY, settings.SLOW_QUERY_REPORT_SIZE)
+    values = cache.get_many([key + suffix for key in entries for suffix in REPORT_COUNTERS])
+    report = []
+    for key, meta in entries.items():
+        count = values.get(key + ":count")
+        if not count:
+            continue
+        total_ms = values.get(key + ":total_us", 0) / 1000
+        report.append({
+            **meta, "count": count, "total_ms": total_ms,
+            "max_ms": values.get(key + ":max_us", 0) / 1000, "avg_ms": total_ms / count,
+        })
+    report.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    return report[:top]
+
+
+def reset_slow_query_report():
+    counters.unregister(REPORT_KEY, settings.SLOW_QUERY_REPORT_SIZE, REPORT_COUNTERS)
+
+
+class QueryBudget:
+    """Execute wrapper applying a statement timeout and timing each query."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.view_name = "-"
+        self.timeout_ms = 0
+        self.applied_ms = 0  # what the connection's statement_timeout is set to; 0: server default
+
+    def set_view(self, view_func, path, url_name):
+        self.view_name = view_name(view_func)
+        self.timeout_ms = view_timeout(view_func, path, url_name)
+
+    @contextmanager
+    def for_view(self, view_func, path, url_name):
+        """Apply `view_func`'s budget inside the block, e.g. for a batch sub-request."""
+        previous = self.view_name, self.timeout_ms
+        self.set_view(view_func, path, url_name)
+        try:
+            yield self
+        finally:
+            self.view_name, self.timeout_ms = previous
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.timeout_ms != self.applied_ms and self.connection.vendor == "postgresql":
+            if self.timeout_ms:
+                context["cursor"].cursor.execute("SET statement_timeout = %s", [self.timeout_ms])
+            else:
+                context["cursor"].cursor.execute("RESET statement_timeout")
+            self.applied_ms = self.timeout_ms
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+                try:
+                    record_slow_query(self.view_name, sql, params, duration_ms)
+                except Exception:
+                    logger.exception("Could not record slow query")
+
+    def reset(self):
+        if not self.applied_ms:
+            return
+        self.applied_ms = 0
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("RESET statement_timeout")
+        except DatabaseError:
+            # Connection is unusable (e.g. aborted transaction); Django will
+            # close it, which discards the setting as well.
+            pass
@@ -0,0 +1,237 @@
+# dashboard/response_cache.py
+"""
+Versioned per-user cache of rendered GET responses.
+
+Entries are keyed by (user, route, normalized query string, renderer) plus
+the versions of the scopes the view depends on:
+
+    "user"   bumped when the user's profile or any of their todos change
+    "users"  bumped when any user changes (the shared /api/users/ list)
+    "perms"  the permission cache versions (group membership on /auth/me/)
+
+plus a global version, bumped when a set-based write touched too many rows
+to invalidate them one by one.
+
+Writes only increment version keys, so invalidation is O(1) and old entries
+simply stop being addressed until they expire. Entries live in a
+per-process local-memory tier in front of the shared backend
+(RESPONSE_CACHE_SHARED_ALIAS), which also holds the version keys so every
+process sees a bump. Without a shared backend the cache is off by default
+(RESPONSE_CACHE_ENABLED): other workers would keep serving stale entries.
+
+Invalidation follows the outbox: every published event (see
+dashboard.signals.outbox_published) bumps the versions it touches.
+"""
+import hashlib
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from dashboard import perm_cache
+from dashboard.signals import outbox_published
+
+USERS_VERSION_KEY = "resp:v:users"
+ALL_VERSION_KEY = "resp:v:all"
+CACHE_HEADER = "X-Response-Cache"
+# Local hit / shared hit / miss counters, buffered per process
+STATS_FLUSH_EVERY = 100
+STATS_KEYS = {"local": "resp:stats:local", "shared": "resp:stats:shared", "miss": "resp:stats:miss"}
+
+_stats_lock = Lock()
+_pending = dict.fromkeys(STATS_KEYS, 0)
+
+
+def _local():
+    return caches[settings.RESPONSE_CACHE_LOCAL_ALIAS]
+
+
+def _shared():
+    alias = settings.RESPONSE_CACHE_SHARED_ALIAS
+    return caches[alias] if alias else None
+
+
+def _versions():
+    return caches[settings.RESPONSE_CACHE_SHARED_ALIAS or "default"]
+
+
+def _user_version_key(user_id):
+    return f"resp:v:user:{user_id}"
+
+
+def _bump(key):
+    cache = _versions()
+    cache.add(key, 1, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def invalidate_users(user_ids, all_users=False):
+    """Bump the given users' versions (and the shared users list)."""
+    user_ids = set(user_ids)
+
+    def bump():
+        for user_id in user_ids:
+            _bump(_user_version_key(user_id))
+        if all_users:
+            _bump(USERS_VERSION_KEY)
+
+    # Now, so the writing request's own reads are fresh, and again after
+    # commit, in case another request cached the pre-commit state meanwhile
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_all():
+    """Drop every cached response, e.g. after a write to an unknown set of users."""
+    _bump(ALL_VERSION_KEY)
+    transaction.on_commit(lambda: _bump(ALL_VERSION_KEY))
+
+
+def _outbox_published(sender, aggregate_type, payloads, **kwargs):
+    # Cached GET responses must not outlive the commit of the change
+    if payloads is None:
+        invalidate_all()
+    elif aggregate_type == "todo":
+        invalidate_users({payload["owner_id"] for payload in payloads})
+    elif aggregate_type == "user":
+        invalidate_users({payload["id"] for payload in payloads}, all_users=True)
+
+
+def connect_signals():
+    outbox_published.connect(_outbox_published, dispatch_uid="response_cache_outbox")
+
+
+def _record(kind):
+    with _stats_lock:
+        _pending[kind] += 1
+        if sum(_pending.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_pending)
+        for name in _pending:
+            _pending[name] = 0
+    flush_stats(pending)
+
+
+def flush_stats(pending=None):
+    if pending is None:
+        with _stats_lock:
+            pending = dict(_pending)
+            for name in _pending:
+                _pending[name] = 0
+    cache = _versions()
+    for kind, count in pending.items():
+        if not count:
+            continue
+        cache.add(STATS_KEYS[kind], 0, timeout=None)
+        try:
+            cache.incr(STATS_KEYS[kind], count)
+        except ValueError:
+            cache.set(STATS_KEYS[kind], count, timeout=None)
+
+
+def get_stats():
+    """Shared hit/miss totals, including this process's unflushed counts."""
+    flush_stats()
+    cache = _versions()
+    counts = {kind: cache.get(key, 0) for kind, key in STATS_KEYS.items()}
+    total = sum(counts.values())
+    hits = counts["local"] + counts["shared"]
+    return {**counts, "hits": hits, "ratio": hits / total if total else 0.0}
+
+
+def normalize_query(query_params):
+    """Order-insensitive form of the query string; blank values are dropped."""
+    items = sorted(
+        (key, value.strip())
+        for key in query_params
+        for value in query_params.getlist(key)
+        if value.strip()
+    )
+    return "&".join(f"{key}={value}" for key, value in items)
+
+
+def cache_key(request, scopes):
+    user_id = request.user.pk
+    version_keys = [ALL_VERSION_KEY]
+    if "user" in scopes:
+        version_keys.append(_user_version_key(user_id))
+    if "users" in scopes:
+        version_keys.append(USERS_VERSION_KEY)
+    stored = _versions().get_many(version_keys)
+    versions = [stored.get(key, 1) for key in version_keys]
+    if "perms" in scopes:
+        versions += perm_cache.current_versions(user_id)
+
+    query = hashlib.sha1(normalize_query(request.query_params).encode("utf-8")).hexdigest()[:16]
+    return f"resp:{user_id}:{'.'.join(map(str, versions))}:{request.accepted_renderer.format}:{request.path}:{query}"
+
+
+def lookup(key):
+    entry = _local().get(key)
+    if entry is not None:
+        _record("local")
+        return entry
+    shared = _shared()
+    entry = shared.get(key) if shared is not None else None
+    if entry is not None:
+        _local().set(key, entry, timeout=settings.RESPONSE_CACHE_LOCAL_TIMEOUT)
+        _record("shared")
+        return entry
+    _record("miss")
+    return None
+
+
+def store(key, response):
+    entry = (response["Content-Type"], response.content)
+    _local().set(key, entry, timeout=settings.RESPONSE_CACHE_LOCAL_TIMEOUT)
+    shared = _shared()
+    if shared is not None:
+        shared.set(key, entry, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+
+class ResponseCacheMixin:
+    """
+    Serves authenticated GETs from the response cache. `response_cache_scopes`
+    lists the version scopes (see module docstring) the view's output depends on.
+    """
+    response_cache_scopes = ("user",)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = None
+        if (
+            not settings.RESPONSE_CACHE_ENABLED
+            or request.method != "GET"
+            or not request.user.is_authenticated
+        ):
+            return
+        key = cache_key(request, self.response_cache_scopes)
+        entry = lookup(key)
+        if entry is None:
+            self._response_cache_key = key
+            return
+
+        content_type, content = entry
+
+        def cached_handler(request, *args, **kwargs):
+            response = HttpResponse(content, content_type=content_type)
+            response[CACHE_HEADER] = "HIT"
+            return response
+
+        # Serve the stored bytes instead of running list()/retrieve()
+        self.get = cached_handler
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "_response_cache_key", None)
+        if key and isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+            response[CACHE_HEADER] = "MISS"
+            response.add_post_render_callback(lambda rendered: store(key, rendered))
+        return response
@@ -0,0 +1,39 @@
+# dashboard/serializers/batch.py
+from django.conf import settings
+from rest_framework import serializers
+
+BATCH_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS, default="GET")
+    path = serializers.CharField(help_text="API path, optionally with a query string, e.g. /api/todos/?page=2")
+    body = serializers.JSONField(required=False, allow_null=True, help_text="JSON request body")
+
+    def validate_path(self, value):
+        if not value.startswith("/api/"):
+            raise serializers.ValidationError("Only /api/ paths can be batched.")
+        if value.split("?", 1)[0].rstrip("/") == "/api/batch":
+            raise serializers.ValidationError("Batch requests cannot be nested.")
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True)
+
+    def validate_requests(self, value):
+        limit = settings.BATCH_MAX_REQUESTS
+        if not value:
+            raise serializers.ValidationError("At least one request is required.")
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} requests per batch.")
+        return value
+
+
+class BatchSubResponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = BatchSubResponseSerializer(many=True)
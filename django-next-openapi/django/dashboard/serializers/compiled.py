@@ -0,0 +1,145 @@
+# dashboard/serializers/compiled.py
+"""
+Compiled read path for list endpoints.
+
+`compile_serializer(TodoSerializer)` inspects the serializer's fields once
+and returns a CompiledSerializer that turns `.values()` rows into the same
+dicts `TodoSerializer(many=True).data` would produce, without building
+model instances or calling get_attribute per field and row.
+
+Only plain column fields (and columns reached through foreign keys, such as
+`owner.email`) can be compiled. Serializers with anything else (method
+fields, nested serializers, source="*", properties) return None and the
+view keeps using the regular serializer.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+def _identity(value):
+    return value
+
+
+def _converter(field):
+    """
+    A function equivalent to `field.to_representation` for non-null column
+    values, or None if the field can't be compiled.
+    """
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # .values() yields the raw key, which is what .pk would give
+        return field.pk_field.to_representation if field.pk_field else _identity
+    if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField,
+                          serializers.BaseSerializer, serializers.SerializerMethodField)):
+        return None
+    if isinstance(field, serializers.BooleanField):
+        # Database booleans are already True/False
+        return _identity
+    if isinstance(field, serializers.CharField):
+        return str
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == "hex_verbose":
+        return str
+    # Everything else (datetimes, decimals, choices, ...) keeps DRF's formatting
+    return field.to_representation
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation with the timezone looked up once per
+    call of serialize() rather than per value. Anything but the common case
+    (aware values, ISO 8601 output) is left to DRF.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+def _values_key(model, source_attrs):
+    """`.values()` lookup for a dotted source, or None if it isn't a column."""
+    parts = []
+    for index, attr in enumerate(source_attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        parts.append(model_field.name)
+        if index < len(source_attrs) - 1:
+            if not model_field.many_to_one:
+                return None
+            model = model_field.related_model
+    return "__".join(parts)
+
+
+class CompiledSerializer:
+    def __init__(self, columns, datetime_fields):
+        # [(field name, values() key, converter)], in serializer field order
+        self.columns = columns
+        self.field_names = [name for name, _, _ in columns]
+        # Converters depending on the active timezone, bound per serialize()
+        self.datetime_fields = datetime_fields
+
+    def _selected(self, field_names):
+        if field_names is None:
+            return self.columns
+        return [column for column in self.columns if column[0] in field_names]
+
+    def _bound(self, field_names):
+        return [
+            (name, key, _datetime_converter(self.datetime_fields[name])
+             if name in self.datetime_fields else convert)
+            for name, key, convert in self._selected(field_names)
+        ]
+
+    def values(self, queryset, field_names=None):
+        keys = dict.fromkeys(key for _, key, _ in self._selected(field_names))
+        return queryset.values(*keys)
+
+    def serialize(self, rows, field_names=None):
+        columns = self._bound(field_names)
+        return [
+            {
+                name: None if (value := row[key]) is None else convert(value)
+                for name, key, convert in columns
+            }
+            for row in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """Build (once per class) the compiled read path, or None if unsupported."""
+    meta = getattr(serializer_class, "Meta", None)
+    model = getattr(meta, "model", None)
+    if model is None:
+        return None
+
+    columns, datetime_fields = [], {}
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            return None
+        key = _values_key(model, field.source_attrs)
+        convert = _converter(field)
+        if key is None or convert is None:
+            return None
+        columns.append((name, key, convert))
+        if isinstance(field, serializers.DateTimeField):
+            datetime_fields[name] = field
+    return CompiledSerializer(columns, datetime_fields)
@@ -1,7 +1,8 @@
 # dashboard/serializers/general.py
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from dashboard.models import Todo
+from dashboard.fieldsets import SparseFieldsetsMixin
+from dashboard.models import Todo, TodoStats
 
 User = get_user_model()
 
@@ -11,7 +12,7 @@ class TimestampedModelSerializer(serializers.ModelSerializer):
         abstract = True
         read_only_fields = ("created_at", "updated_at")
 
-class UserSerializer(TimestampedModelSerializer):
+class UserSerializer(SparseFieldsetsMixin, TimestampedModelSerializer):
     class Meta:
         model = User
         fields = ("id", "email", "avatar", "name", "phone", "birthday", "is_active",
@@ -20,10 +21,20 @@ class UserSerializer(TimestampedModelSerializer):
         read_only_fields = ("created_at", "updated_at")
 
 
-class TodoSerializer(serializers.ModelSerializer):
+class TodoSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     owner_email = serializers.EmailField(source="owner.email", read_only=True)
 
     class Meta:
         model = Todo
-        fields = ("id", "owner", "owner_email", "title", "description", "is_complete", "created_at", "updated_at")
-        read_only_fields = ("id", "owner", "owner_email", "created_at", "updated_at")   
\ No newline at end of file
+        fields = ("id", "owner", "owner_email", "title", "description", "is_complete", "is_archived",
+                  "created_at", "updated_at")
+        read_only_fields = ("id", "owner", "owner_email", "is_archived", "created_at", "updated_at")
+
+
+class TodoStatsSerializer(serializers.ModelSerializer):
+    open = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TodoStats
+        fields = ("total", "open", "completed", "last_activity_at")
+        read_only_fields = fields
@@ -0,0 +1,8 @@
+# dashboard/signals.py
+from django.dispatch import Signal
+
+# Sent once outbox events for rows of `sender` are written, inside the
+# writing transaction, with `aggregate_type` and `payloads`: dicts holding at
+# least sender.outbox_key_fields of the changed rows, or None when a
+# set-based write touched too many rows to list
+outbox_published = Signal()
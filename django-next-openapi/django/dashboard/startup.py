@@ -0,0 +1,61 @@
+# dashboard/startup.py
+"""
+Import-time profiling of process startup.
+
+`profile_imports()` imports a module (main.wsgi by default) in a fresh
+interpreter started with `-X importtime` and returns the cost of every
+module it pulled in. Used by `manage.py profile_startup` and the cold-start
+budget test.
+"""
+import re
+import subprocess
+import sys
+from collections import Counter, namedtuple
+
+from django.conf import settings
+
+ImportRecord = namedtuple("ImportRecord", "module self_us cumulative_us depth")
+
+# Modules web processes should not load at boot (see main/__init__.py,
+# main/urls.py and INSTALLED_APPS)
+LAZY_MODULES = ("celery", "django_extensions", "distutils", "drf_spectacular.generators")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_imports(target="main.wsgi"):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, cwd=settings.BASE_DIR,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def total_ms(records):
+    # Top-level entries' cumulative times add up to the whole import
+    return sum(record.cumulative_us for record in records if record.depth == 0) / 1000
+
+
+def by_package(records):
+    """Self time in ms per top-level package, most expensive first."""
+    totals = Counter()
+    for record in records:
+        totals[record.module.partition(".")[0]] += record.self_us
+    return [(package, us / 1000) for package, us in totals.most_common()]
+
+
+def loaded_lazy_modules(records):
+    names = {record.module for record in records}
+    return sorted(
+        name for name in names
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
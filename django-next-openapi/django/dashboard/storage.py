@@ -0,0 +1,44 @@
+# dashboard/storage.py
+"""
+Static files storage (STATICFILES_STORAGE).
+
+Like WhiteNoise's CompressedManifestStaticFilesStorage, but `collectstatic`
+writes the gzip and brotli variants of the collected files on a thread pool
+(STATIC_COMPRESS_WORKERS) instead of one file after another. WhiteNoise
+serves those variants to clients that accept them, so the API workers never
+compress static files themselves. Brotli variants need the `Brotli` package;
+without it only gzip is written (see the dashboard.W001 deploy check).
+
+The manifest is read once, when the storage is first used (the static files
+middleware does so at startup), and the set of hashed names derived from it
+decides which files get far-future immutable caching.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class ParallelCompressedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    _hashed_names = None
+
+    def compress_files(self, names):
+        extensions = getattr(settings, "WHITENOISE_SKIP_COMPRESS_EXTENSIONS", None)
+        compressor = self.create_compressor(extensions=extensions, quiet=True)
+
+        def compress(name):
+            path = self.path(name)
+            prefix_len = len(path) - len(name)
+            return [(name, compressed_path[prefix_len:]) for compressed_path in compressor.compress(path)]
+
+        names = [name for name in names if compressor.should_compress(name)]
+        # zlib (and brotli) do their work outside the GIL, so threads scale
+        with ThreadPoolExecutor(max_workers=settings.STATIC_COMPRESS_WORKERS) as pool:
+            for compressed in pool.map(compress, names):
+                yield from compressed
+
+    def is_immutable(self, name):
+        """True if `name` is a hashed name from the manifest."""
+        if self._hashed_names is None:
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return name in self._hashed_names
@@ -2,9 +2,40 @@ from celery import shared_task
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 
+from dashboard.idempotency import purge_expired
+from dashboard.outbox import purge_dispatched, relay_outbox
+from dashboard.partitions import archive_completed_todos, ensure_future_partitions
+# Configure the project app before anything is sent; main no longer imports it eagerly
+from main.celery import app as celery_app  # noqa: F401
+
 @shared_task
 def send_celery_email(candidate_email, subject, plain_text, html_content=None):
     msg = EmailMultiAlternatives(subject=subject, body=plain_text, from_email=settings.EMAIL_HOST_USER, to=[candidate_email])
     if html_content:
         msg.attach_alternative(html_content, "text/html")
     msg.send()
+
+
+@shared_task
+def maintain_todo_partitions():
+    """Create upcoming monthly partitions and archive old completed todos."""
+    created = ensure_future_partitions()
+    archived = archive_completed_todos()
+    return {"partitions_created": created, "archived": archived}
+
+
+@shared_task(ignore_result=True)
+def relay_outbox_events():
+    """Deliver pending outbox events (see dashboard/outbox.py)."""
+    return relay_outbox()
+
+
+@shared_task
+def purge_outbox():
+    return {"purged": purge_dispatched()}
+
+
+@shared_task
+def purge_idempotency_records():
+    """Delete stored Idempotency-Key responses past their TTL."""
+    return {"purged": purge_expired()}
@@ -1,3 +1,1002 @@
-from django.test import TestCase
+import gzip
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from whitenoise.compress import brotli_installed
+
+from dashboard import compression, idempotency, profiler
+from dashboard.middleware import CompressionMiddleware
+from dashboard.checks import check_view_query_fields, indexed_query_fields_check, shared_cache_check
+from dashboard.fieldsets import get_model_columns
+from dashboard.filters import IndexedOrderingFilter, TimestampFilterBackend, timestamp_fields
+from dashboard.partitions import archive_completed_todos
+from dashboard.querybudget import (
+    QueryBudget, normalize_sql, record_slow_query, reset_slow_query_report, slow_query_report,
+)
+from dashboard.response_cache import CACHE_HEADER, get_stats as response_cache_stats
+from dashboard.models import IdempotencyRecord, OutboxEvent, Todo, TodoStats, User
+from dashboard.outbox import relay_outbox, send_welcome_email
+from dashboard.serializers.compiled import compile_serializer
+from dashboard.serializers.general import TodoSerializer, TodoStatsSerializer, UserSerializer
+from dashboard.startup import loaded_lazy_modules, profile_imports, total_ms
+from dashboard.tasks import send_celery_email
+from dashboard.views.batch import BatchView
+from dashboard.views.general import TodoListCreateView, UserViewSet
+
+
+class IndexedQueryFieldsTests(SimpleTestCase):
+    def test_declared_fields_are_index_backed(self):
+        self.assertEqual(indexed_query_fields_check(None), [])
+
+    def test_unindexed_field_is_reported(self):
+        class UnindexedTodoView(generics.ListAPIView):
+            queryset = Todo.objects.all()
+            ordering_fields = ["title"]
+
+        errors = check_view_query_fields(UnindexedTodoView)
+        self.assertEqual([e.id for e in errors], ["dashboard.E001"])
+
+    def test_scoped_composite_index_requires_scope(self):
+        class UnscopedTodoView(generics.ListAPIView):
+            queryset = Todo.objects.all()
+            filterset_fields = ["is_complete"]
+
+        self.assertEqual(len(check_view_query_fields(UnscopedTodoView)), 1)
+        self.assertEqual(check_view_query_fields(TodoListCreateView), [])
+
+    def test_timestamp_filters_need_an_index(self):
+        class UserListView(generics.ListAPIView):
+            queryset = User.objects.all()
+
+        # User.updated_at has no index, and Todo.created_at's needs the owner scope
+        self.assertEqual(timestamp_fields(UserListView), ("created_at",))
+        self.assertEqual(timestamp_fields(TodoListCreateView), ("created_at",))
+        names = [p["name"] for p in TimestampFilterBackend().get_schema_operation_parameters(UserListView)]
+        self.assertEqual(names, ["created_at__gte", "created_at__lte"])
+
+        def filter_todos(**params):
+            request = Request(RequestFactory().get("/api/todos/", params))
+            return TimestampFilterBackend().filter_queryset(request, Todo.objects.all(), TodoListCreateView)
+
+        self.assertIn("created_at", str(filter_todos(created_at__gte="2024-01-01").query))
+        with self.assertRaises(ValidationError) as raised:
+            filter_todos(created_at__gte="2024-01-01", updated_at__lte="2024-01-01")
+        self.assertEqual(list(raised.exception.detail), ["updated_at__lte"])
+
+        UserListView.timestamp_fields = ("updated_at",)
+        errors = check_view_query_fields(UserListView)
+        self.assertEqual([(e.id, "timestamp_fields" in e.msg) for e in errors], [("dashboard.E001", True)])
+
+    def test_ordering_schema_lists_allowed_values(self):
+        params = IndexedOrderingFilter().get_schema_operation_parameters(UserViewSet)
+        self.assertEqual(
+            params[0]["schema"]["items"]["enum"],
+            ["id", "-id", "email", "-email", "created_at", "-created_at"],
+        )
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="owner@example.com", password="pw")
+        Todo.objects.create(owner=self.user, title="one", description="x" * 1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_model_columns_follow_serializer_sources(self):
+        only, related = get_model_columns(TodoSerializer, ["title", "owner_email"])
+        self.assertEqual(only, ["id", "owner", "owner__email", "title"])
+        self.assertEqual(related, ["owner"])
+
+    def test_fields_trims_output_and_sql(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/todos/", {"fields": "id,title"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+        todo_sql = [q["sql"] for q in ctx.captured_queries if "dashboard_todo" in q["sql"]]
+        self.assertFalse(any('"description"' in sql for sql in todo_sql))
+
+    def test_exclude_and_unknown_fields(self):
+        response = self.client.get("/api/todos/", {"exclude": "description"})
+        self.assertNotIn("description", response.data["results"][0])
+        self.assertIn("owner_email", response.data["results"][0])
+
+        response = self.client.get("/api/todos/", {"fields": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_current_user_fields(self):
+        response = self.client.get("/api/auth/me/", {"fields": "id,email"})
+        self.assertEqual(set(response.data), {"id", "email"})
+
+
+@override_settings(BATCH_MAX_WORKERS=1)  # test transactions are not visible to pool threads
+class BatchViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="batch@example.com", password="pw")
+        self.todo = Todo.objects.create(owner=self.user, title="first")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_runs_sub_requests_in_order(self):
+        response = self.client.post("/api/batch/", {"requests": [
+            {"path": "/api/auth/me/?fields=email"},
+            {"method": "POST", "path": "/api/todos/", "body": {"title": "second"}},
+            {"path": "/api/todos/?fields=title"},
+            {"path": f"/api/todos/{self.todo.id}/nope/"},
+        ]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        statuses = [item["status"] for item in response.data["responses"]]
+        self.assertEqual(statuses, [200, 201, 200, 404])
+        self.assertEqual(response.data["responses"][0]["body"], {"email": "batch@example.com"})
+        titles = [t["title"] for t in response.data["responses"][2]["body"]["results"]]
+        self.assertEqual(sorted(titles), ["first", "second"])
+
+    def test_rejects_nested_and_non_api_paths(self):
+        for path in ("/api/batch/", "/admin/"):
+            response = self.client.post("/api/batch/", {"requests": [{"path": path}]}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_authentication(self):
+        response = APIClient().post("/api/batch/", {"requests": [{"path": "/api/todos/"}]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_statement_timeout_is_a_503(self):
+        class Canceled(Exception):
+            pgcode = "57014"
+
+        def raise_timeout(execute, sql, params, many, context):
+            raise OperationalError("canceling statement due to statement timeout") from Canceled()
+
+        with connection.execute_wrapper(raise_timeout), self.assertLogs("dashboard", "WARNING"):
+            response = self.client.post("/api/batch/", {"requests": [{"path": "/api/todos/"}]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["responses"][0]["status"], 503)
+
+    def test_sub_requests_run_under_their_own_budget(self):
+        def budgets():
+            return {(b.view_name, b.timeout_ms) for b in connection.execute_wrappers if isinstance(b, QueryBudget)}
+
+        seen = set()
+
+        def probe(execute, sql, params, many, context):
+            seen.update(budgets())
+            return execute(sql, params, many, context)
+
+        class ProbeView(BatchView):
+            def _dispatch(self, request, item, budget):
+                seen.update(budgets())
+
+        # Concurrent reads: each worker thread wraps its own connection
+        with connection.execute_wrapper(probe):
+            self.client.post("/api/batch/", {"requests": [
+                {"path": "/api/users/?search=batch"},
+                {"path": "/api/auth/me/"},
+                {"method": "POST", "path": "/api/todos/", "body": {"title": "budgeted"}},
+            ]}, format="json")
+        self.assertTrue({
+            ("dashboard.views.general.UserViewSet", 2000),
+            ("access.views.CurrentUserView", settings.STATEMENT_TIMEOUT_MS),
+            ("dashboard.views.general.TodoListCreateView", 2000),
+        } <= seen)
+
+        seen.clear()
+        request = SimpleNamespace(_request=SimpleNamespace())
+        worker = threading.Thread(target=ProbeView()._dispatch_in_thread, args=(request, {}))
+        worker.start()
+        worker.join()
+        self.assertEqual(seen, {("-", 0)})
+
+
+class TodoStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="stats@example.com", password="pw")
+
+    def assertCounters(self, total, completed):
+        stats = TodoStats.objects.get(user=self.user)
+        self.assertEqual((stats.total, stats.completed, stats.open), (total, completed, total - completed))
+
+    def test_single_instance_writes(self):
+        todo = Todo.objects.create(owner=self.user, title="a")
+        Todo.objects.create(owner=self.user, title="b", is_complete=True)
+        self.assertCounters(2, 1)
+
+        todo.is_complete = True
+        todo.save()
+        self.assertCounters(2, 2)
+
+        todo.delete()
+        self.assertCounters(1, 1)
+
+    def test_stale_instances_do_not_double_count(self):
+        todo = Todo.objects.create(owner=self.user, title="a")
+        first, second = Todo.objects.get(pk=todo.pk), Todo.objects.get(pk=todo.pk)
+        first.is_complete = second.is_complete = True
+        first.save()
+        second.save()
+        self.assertCounters(1, 1)
+
+        Todo.objects.create(owner=self.user, title="b")
+        first.delete()
+        second.delete()
+        self.assertCounters(1, 0)
+
+    def test_bulk_writes(self):
+        Todo.objects.bulk_create([Todo(owner=self.user, title=str(i)) for i in range(5)])
+        self.assertCounters(5, 0)
+
+        Todo.objects.filter(owner=self.user, title__in=["0", "1"]).update(is_complete=True)
+        self.assertCounters(5, 2)
+
+        todos = list(Todo.objects.filter(owner=self.user, title="0"))
+        todos[0].is_complete = False
+        Todo.objects.bulk_update(todos, ["is_complete"])
+        self.assertCounters(5, 1)
+
+        Todo.objects.filter(owner=self.user, is_complete=False).delete()
+        self.assertCounters(1, 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        Todo.objects.create(owner=self.user, title="a", is_complete=True)
+        TodoStats.objects.filter(user=self.user).update(total=10, completed=0)
+
+        out = StringIO()
+        call_command("reconcile_todo_stats", stdout=out)
+        self.assertIn("repaired 1", out.getvalue())
+        self.assertCounters(1, 1)
+
+    def test_stats_endpoint_is_a_single_lookup(self):
+        Todo.objects.create(owner=self.user, title="a")
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            response = client.get("/api/todos/stats/")
+        self.assertEqual(response.data["total"], 1)
+        self.assertEqual(response.data["open"], 1)
+
+
+@override_settings(PERMISSION_CACHE_ENABLED=True)
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="perms@example.com", password="pw")
+        self.group = Group.objects.create(name="editors")
+        self.perm = Permission.objects.get(codename="change_todo")
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_permission_checks_are_cached(self):
+        self.group.permissions.add(self.perm)
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm("dashboard.change_todo"))
+
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("dashboard.change_todo"))
+            self.assertEqual([g.name for g in user.cached_groups], ["editors"])
+
+    def test_membership_and_group_changes_invalidate(self):
+        self.user.groups.add(self.group)
+        self.assertFalse(self.fresh_user().has_perm("dashboard.change_todo"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.perm)
+        self.assertTrue(self.fresh_user().has_perm("dashboard.change_todo"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.group)
+        user = self.fresh_user()
+        self.assertFalse(user.has_perm("dashboard.change_todo"))
+        self.assertEqual(user.cached_groups, [])
+
+    def test_current_user_groups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.group)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/auth/me/", {"fields": "groups"})
+        self.assertEqual(response.data["groups"], [{"id": self.group.id, "name": "editors"}])
+
+    def test_group_rename_invalidates(self):
+        self.user.groups.add(self.group)
+        self.assertEqual([g.name for g in self.fresh_user().cached_groups], ["editors"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.name = "reviewers"
+            self.group.save()
+        self.assertEqual([g.name for g in self.fresh_user().cached_groups], ["reviewers"])
+
+    def test_needs_shared_cache(self):
+        self.assertEqual([e.id for e in shared_cache_check(None)], ["dashboard.E003"])
+        with override_settings(PERMISSION_CACHE_ENABLED=False):
+            self.assertEqual(shared_cache_check(None), [])
+            self.user.groups.add(self.group)
+            self.fresh_user().cached_groups
+            user = self.fresh_user()
+            with self.assertNumQueries(3):
+                self.assertEqual([g.name for g in user.cached_groups], ["editors"])
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class UserAdminTests(TestCase):
+    changelist = "/admin/dashboard/user/"
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email="admin@example.com", password="pw")
+        User.objects.bulk_create([User(email=f"user{i}@example.com", referral_code=f"ref{i}",
+                                       email_unsubscribe_token=f"tok{i}", phone=f"+100{i}")
+                                  for i in range(60)])
+        self.client.force_login(self.admin)
+
+    def test_keyset_pages(self):
+        response = self.client.get(self.changelist)
+        self.assertEqual(response.status_code, 200)
+        cl = response.context["cl"]
+        self.assertTrue(cl.keyset)
+        self.assertEqual(len(cl.result_list), 50)
+        self.assertIn("cursor=", cl.next_url)
+
+        response = self.client.get(self.changelist + cl.next_url)
+        cl = response.context["cl"]
+        self.assertEqual(len(cl.result_list), 11)
+        self.assertIsNone(cl.next_url)
+
+    def test_search_uses_prefix_and_exact_lookups(self):
+        response = self.client.get(self.changelist, {"q": "user1"})
+        emails = {u.email for u in response.context["cl"].result_list}
+        self.assertEqual(len(emails), 11)  # user1, user10..user19
+
+        response = self.client.get(self.changelist, {"q": "+1005"})
+        self.assertEqual([u.email for u in response.context["cl"].result_list], ["user5@example.com"])
+
+    def test_bulk_actions_are_single_updates(self):
+        ids = list(User.objects.exclude(pk=self.admin.pk).values_list("pk", flat=True)[:10])
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.changelist, {"action": "ban_users", ACTION_CHECKBOX_NAME: ids})
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(User.objects.filter(is_banned=True).count(), 10)
+
+
+class TodoArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="archive@example.com", password="pw")
+        self.old_done = Todo.objects.create(owner=self.user, title="old done", is_complete=True)
+        self.old_open = Todo.objects.create(owner=self.user, title="old open")
+        self.recent_done = Todo.objects.create(owner=self.user, title="recent done", is_complete=True)
+        long_ago = timezone.now() - timedelta(days=365)
+        Todo.objects.filter(pk__in=[self.old_done.pk, self.old_open.pk]).update(updated_at=long_ago)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_archives_only_old_completed_todos(self):
+        self.assertEqual(archive_completed_todos(older_than_days=90, batch_size=1), 1)
+        self.assertEqual(list(Todo.objects.filter(is_archived=True)), [self.old_done])
+        # Counters cover archived todos too, so archiving doesn't change them
+        stats = TodoStats.objects.get(user=self.user)
+        self.assertEqual((stats.total, stats.completed), (3, 2))
+
+    def test_archived_todos_are_opt_in(self):
+        archive_completed_todos(older_than_days=90)
+        detail = f"/api/todos/{self.old_done.pk}/"
+
+        titles = [t["title"] for t in self.client.get("/api/todos/").data["results"]]
+        self.assertNotIn("old done", titles)
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+        response = self.client.get("/api/todos/", {"include_archived": "true"})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertTrue(self.client.get(detail, {"include_archived": "true"}).data["is_archived"])
+        self.assertEqual(self.client.patch(f"{detail}?include_archived=true", {"title": "x"}).status_code, 404)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="budget@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        reset_slow_query_report()
+
+    def test_normalize_sql_collapses_in_lists(self):
+        self.assertEqual(
+            normalize_sql('SELECT * FROM "t"\n  WHERE "id" IN (%s, %s,%s)'),
+            normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s)'),
+        )
+
+    # The second request must reach the database, not the response cache
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_REPORT_ENABLED=True)
+    def test_slow_queries_are_aggregated_per_view(self):
+        with self.assertLogs("dashboard", "WARNING"):
+            self.client.get("/api/todos/")
+            self.client.get("/api/todos/")
+
+        report = slow_query_report(top=100)
+        views = {entry["view"] for entry in report}
+        self.assertIn("dashboard.views.general.TodoListCreateView", views)
+        self.assertTrue(all(entry["count"] >= 2 for entry in report
+                            if entry["view"].endswith("TodoListCreateView")))
+
+        out = StringIO()
+        call_command("slow_query_report", "--top", "1", "--reset", stdout=out)
+        self.assertIn("TodoListCreateView", out.getvalue())
+        self.assertEqual(slow_query_report(), [])
+
+    @override_settings(SLOW_QUERY_REPORT_ENABLED=True)
+    def test_concurrent_samples_are_not_lost(self):
+        def record():
+            for _ in range(50):
+                record_slow_query("view", "SELECT 1", None, 1.0)
+
+        workers = [threading.Thread(target=record) for _ in range(4)]
+        with self.assertLogs("dashboard", "WARNING"):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        [entry] = slow_query_report()
+        self.assertEqual((entry["count"], entry["total_ms"]), (200, 200.0))
+
+    def test_report_needs_a_shared_cache(self):
+        with self.assertLogs("dashboard", "WARNING"):
+            record_slow_query("view", "SELECT 1", None, 1.0)
+        self.assertEqual(slow_query_report(), [])
+        with override_settings(SLOW_QUERY_REPORT_ENABLED=True):
+            self.assertIn("SLOW_QUERY_REPORT_ENABLED", shared_cache_check(None)[0].msg)
+
+    def test_statement_timeout_returns_503(self):
+        class Canceled(Exception):
+            pgcode = "57014"
+
+        def raise_timeout(execute, sql, params, many, context):
+            raise OperationalError("canceling statement due to statement timeout") from Canceled()
+
+        with connection.execute_wrapper(raise_timeout), self.assertLogs("dashboard", "WARNING"):
+            response = self.client.get("/api/todos/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertIn("detail", response.json())
+
+
+class StartupBudgetTests(SimpleTestCase):
+    def test_wsgi_cold_start_within_budget(self):
+        records = profile_imports("main.wsgi")
+        self.assertEqual(loaded_lazy_modules(records), [])
+        self.assertLess(total_ms(records), settings.STARTUP_IMPORT_BUDGET_MS)
+
+
+DELIVERED = []
+
+
+def record_event(event):
+    if event.payload.get("title") == "explode":
+        raise RuntimeError("downstream unavailable")
+    DELIVERED.append((event.event_type, event.aggregate_id))
+
+
+@override_settings(OUTBOX_HANDLERS={"todo.*": ["dashboard.tests.record_event"]})
+class OutboxTests(TestCase):
+    def setUp(self):
+        DELIVERED.clear()
+        self.user = User.objects.create_user(email="outbox@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_events_are_written_with_the_change(self):
+        response = self.client.post("/api/todos/", {"title": "write docs"}, format="json")
+        event = OutboxEvent.objects.get(event_type="todo.created")
+        self.assertEqual(event.aggregate_id, response.data["id"])
+        self.assertEqual(event.payload["title"], "write docs")
+        self.assertTrue(OutboxEvent.objects.filter(event_type="user.created").exists())
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Todo.objects.create(owner=self.user, title="rolled back")
+            raise RuntimeError
+        self.assertEqual(OutboxEvent.objects.filter(aggregate_type="todo").count(), 1)
+
+    def test_created_events_are_deduplicated(self):
+        todo = Todo(owner=self.user, title="once")
+        Todo.objects.bulk_create([todo])
+        Todo.objects.bulk_create([todo], ignore_conflicts=True)
+        self.assertEqual(OutboxEvent.objects.filter(event_type="todo.created").count(), 1)
+
+    def test_relay_orders_coalesces_and_retries(self):
+        first = Todo.objects.create(owner=self.user, title="first")
+        for title in ("a", "b", "c"):
+            first.title = title
+            first.save()
+        broken = Todo.objects.create(owner=self.user, title="explode")
+        broken.title = "fixed"
+        broken.save()
+        Todo.objects.filter(pk=first.pk).delete()
+
+        stats = relay_outbox()
+        self.assertEqual(DELIVERED, [
+            ("todo.created", str(first.pk)),
+            ("todo.updated", str(first.pk)),
+            ("todo.deleted", str(first.pk)),
+        ])
+        self.assertEqual((stats["coalesced"], stats["retried"], stats["blocked"]), (2, 1, 1))
+
+        # The failed create holds back the later update until it is retried
+        OutboxEvent.objects.filter(aggregate_id=str(broken.pk)).update(available_at=timezone.now())
+        OutboxEvent.objects.filter(event_type="todo.created", aggregate_id=str(broken.pk)).update(
+            payload={"title": "recovered"}
+        )
+        relay_outbox()
+        self.assertEqual(DELIVERED[-2:], [("todo.created", str(broken.pk)), ("todo.updated", str(broken.pk))])
+        self.assertFalse(OutboxEvent.objects.pending().exists())
+
+    def test_set_based_events_match_instance_events(self):
+        todo = Todo.objects.create(owner=self.user, title="same")
+        Todo.objects.filter(pk=todo.pk).update(title="same")
+        Todo.objects.filter(pk=todo.pk).delete()
+        created, updated, deleted = OutboxEvent.objects.filter(aggregate_type="todo").order_by("id")
+        self.assertEqual({updated.aggregate_id, deleted.aggregate_id}, {created.aggregate_id})
+        self.assertEqual(updated.payload, created.payload)
+        self.assertEqual(deleted.payload, created.payload)
+
+        User.objects.filter(pk=self.user.pk).update(is_banned=True)
+        event = OutboxEvent.objects.filter(event_type="user.updated").get()
+        self.assertEqual(event.aggregate_id, str(self.user.pk))
+        self.assertEqual(event.payload, {"id": self.user.pk, "email": "outbox@example.com", "is_active": True,
+                                         "is_banned": True, "is_email_verified": False})
+
+    @override_settings(OUTBOX_WRITE_CHUNK_SIZE=500)
+    def test_large_updates_write_events_in_bounded_chunks(self):
+        User.objects.bulk_create([User(email=f"bulk{i}@example.com") for i in range(2000)])
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            updated = User.objects.filter(is_banned=False).update(is_banned=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(updated, 2001)
+        self.assertEqual(OutboxEvent.objects.filter(event_type="user.updated").count(), 2001)
+        # Per chunk a pk SELECT, the UPDATE and one INSERT ... SELECT; plus the
+        # final empty SELECT and the savepoint around it all
+        self.assertLessEqual(len(queries), 5 * 3 + 3)
+
+        # Well below what merely loading the rows takes
+        tracemalloc.start()
+        list(User.objects.all())
+        loaded_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, loaded_peak / 2)
+
+    def test_deletes_are_announced_once(self):
+        todo = Todo.objects.create(owner=self.user, title="gone")
+        stale = Todo.objects.get(pk=todo.pk)
+        todo.delete()
+        stale.delete()
+        self.assertEqual(OutboxEvent.objects.filter(event_type="todo.deleted").count(), 1)
+
+    @override_settings(OUTBOX_HANDLERS={"user.created": ["dashboard.outbox.send_welcome_email"]},
+                       EMAIL_HOST="smtp.example.com")
+    def test_welcome_email_is_queued_once_after_commit(self):
+        cache.clear()
+        User.objects.create_user(email="welcome@example.com", password="pw")
+        event = OutboxEvent.objects.get(event_type="user.created", payload__email="welcome@example.com")
+        with mock.patch.object(send_celery_email, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                relay_outbox()
+            self.assertEqual(mail.outbox, [])
+            # A redelivery of the same event does not queue a second mail
+            with self.captureOnCommitCallbacks(execute=True):
+                send_welcome_email(event)
+        self.assertEqual([call.args[0] for call in delay.call_args_list],
+                         ["outbox@example.com", "welcome@example.com"])
+
+
+class CompiledSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="lean@example.com", password="pw", name="Lean")
+        User.objects.create_user(email="other@example.com", phone="+15550001", birthday=timezone.now())
+        Todo.objects.create(owner=self.user, title="one", description="first")
+        Todo.objects.create(owner=self.user, title="two", is_complete=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _expected(self, serializer_class, queryset, fields=None):
+        data = serializer_class(queryset, many=True).data
+        if fields:
+            data = [{name: row[name] for name in fields} for row in data]
+        page = {"count": len(data), "next": None, "previous": None, "results": data}
+        return JSONRenderer().render(page)
+
+    def test_list_output_matches_serializer_byte_for_byte(self):
+        response = self.client.get("/api/todos/")
+        expected = self._expected(TodoSerializer, Todo.objects.order_by("-created_at"))
+        self.assertEqual(response.content, expected)
+
+        response = self.client.get("/api/users/", {"ordering": "id"})
+        self.assertEqual(response.content, self._expected(UserSerializer, User.objects.order_by("id")))
+
+    def test_sparse_fieldsets_match(self):
+        response = self.client.get("/api/todos/", {"fields": "title,owner_email,created_at"})
+        expected = self._expected(
+            TodoSerializer, Todo.objects.order_by("-created_at"),
+            fields=["owner_email", "title", "created_at"],
+        )
+        self.assertEqual(response.content, expected)
+
+    def test_uncompilable_serializers_fall_back(self):
+        self.assertIsNotNone(compile_serializer(TodoSerializer))
+        # `open` is a model property, not a column
+        self.assertIsNone(compile_serializer(TodoStatsSerializer))
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="cached@example.com", password="pw")
+        self.other = User.objects.create_user(email="other-cached@example.com", password="pw")
+        self.todo = Todo.objects.create(owner=self.user, title="cached")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_reads_are_served_from_cache(self):
+        first = self.client.get("/api/todos/", {"fields": "id,title", "is_complete": "false"})
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/todos/?is_complete=false&fields=id,title")
+        self.assertEqual((first[CACHE_HEADER], second[CACHE_HEADER]), ("MISS", "HIT"))
+        self.assertEqual(first.content, second.content)
+        self.assertGreaterEqual(response_cache_stats()["hits"], 1)
+
+    def test_writes_bump_the_users_version(self):
+        detail = f"/api/todos/{self.todo.pk}/"
+        self.client.get(detail)
+        self.client.get("/api/todos/")
+        self.client.patch(detail, {"title": "renamed"}, format="json")
+
+        response = self.client.get(detail)
+        self.assertEqual(response[CACHE_HEADER], "MISS")
+        self.assertEqual(response.json()["title"], "renamed")
+        self.assertEqual(self.client.get("/api/todos/").json()["results"][0]["title"], "renamed")
+
+    def test_entries_are_per_user_and_shared_lists_follow_any_user(self):
+        self.client.get("/api/users/")
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        self.assertEqual(other_client.get("/api/todos/").json()["count"], 0)
+
+        User.objects.filter(pk=self.other.pk).update(name="Renamed")
+        users = self.client.get("/api/users/")
+        self.assertEqual(users[CACHE_HEADER], "MISS")
+        self.assertIn("Renamed", [row["name"] for row in users.json()["results"]])
+
+    def test_needs_shared_cache(self):
+        self.assertEqual([e.id for e in shared_cache_check(None)], ["dashboard.E003"])
+
+    @override_settings(OUTBOX_WRITE_CHUNK_SIZE=1)
+    def test_writes_too_large_to_list_invalidate_everything(self):
+        self.client.get("/api/auth/me/")
+        User.objects.filter(pk__in=[self.user.pk, self.other.pk]).update(name="Bulk")
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        response = self.client.get("/api/auth/me/")
+        self.assertEqual(response[CACHE_HEADER], "MISS")
+        self.assertEqual(response.json()["name"], "Bulk")
+
+    def test_group_changes_refresh_current_user(self):
+        self.client.get("/api/auth/me/")
+        group = Group.objects.create(name="editors")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(group)
+        # Each real request loads its own user; the access memo lives on it
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        response = self.client.get("/api/auth/me/")
+        self.assertEqual(response[CACHE_HEADER], "MISS")
+        self.assertEqual(response.json()["groups"], [{"id": group.pk, "name": "editors"}])
+
+
+@override_settings(PROFILER_ENABLED=True, RESPONSE_CACHE_ENABLED=False,
+                   STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ProfilerTests(TestCase):
+    view_name = "dashboard.views.general.TodoListCreateView"
+
+    def setUp(self):
+        self.staff = User.objects.create_user(email="staff-profiler@example.com", password="pw", is_staff=True)
+        self.user = User.objects.create_user(email="profiled@example.com", password="pw")
+        profiler.clear_config()
+        profiler.reset_profiles()
+
+    def test_fold_stack_is_root_first(self):
+        import sys
+
+        stack = profiler.fold_stack(sys._getframe())
+        self.assertTrue(stack.split(";")[-1].startswith("test_fold_stack_is_root_first (dashboard/tests.py:"))
+        profiler.record_profile("some.View", {stack: 3})
+        self.assertEqual(profiler.collapsed(profiler.get_profiles()), f"some.View;{stack} 3\n")
+
+    def test_concurrent_profiles_are_merged(self):
+        def record():
+            for _ in range(50):
+                profiler.record_profile("some.View", {"a (x.py:1)": 1, "b (x.py:2)": 2})
+
+        workers = [threading.Thread(target=record) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        profile = profiler.get_profiles()["some.View"]
+        self.assertEqual((profile["requests"], profile["samples"]), (200, 600))
+        self.assertEqual(profile["stacks"], {"a (x.py:1)": 200, "b (x.py:2)": 400})
+
+        self.assertIn("PROFILER_ENABLED", shared_cache_check(None)[0].msg)
+
+    @override_settings(PROFILER_ROUTES=["todo-list-create"])
+    def test_configured_routes_are_profiled(self):
+        self.client.force_login(self.user)
+        self.client.get("/api/todos/")
+        self.client.get("/api/auth/me/")
+        profiles = profiler.get_profiles()
+        self.assertEqual(list(profiles), [self.view_name])
+        self.assertEqual(profiles[self.view_name]["requests"], 1)
+
+    def test_profile_header_needs_staff(self):
+        self.client.force_login(self.user)
+        self.client.get("/api/todos/", HTTP_X_PROFILE="1")
+        self.assertEqual(profiler.get_profiles(), {})
+
+        self.client.force_login(self.staff)
+        self.client.get("/api/todos/", HTTP_X_PROFILE="1")
+        self.assertIn(self.view_name, profiler.get_profiles())
+
+    def test_admin_toggle_and_download(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/admin/profiler/download/").status_code, 302)
+
+        self.client.force_login(self.staff)
+        self.client.post("/admin/profiler/", {"action": "enable", "percent": "100", "minutes": "5"})
+        self.assertEqual(profiler.get_config(), {"percent": 100.0, "routes": []})
+        self.client.get("/api/todos/")
+        self.client.post("/admin/profiler/", {"action": "disable"})
+
+        page = self.client.get("/admin/profiler/")
+        self.assertContains(page, self.view_name)
+        profiler.record_profile(self.view_name, {"handler (x.py:1)": 2})
+        response = self.client.get("/admin/profiler/download/", {"view": self.view_name})
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertIn(f"{self.view_name};handler (x.py:1) 2", response.content.decode())
+
+
+class StaticFilesTests(SimpleTestCase):
+    css = "body { background: url('../img/dot.png'); }\n" * 200
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        (tmp / "src" / "css").mkdir(parents=True)
+        (tmp / "src" / "img").mkdir()
+        (tmp / "src" / "css" / "site.css").write_text(self.css)
+        (tmp / "src" / "img" / "dot.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+        self.root = tmp / "root"
+
+        overrides = override_settings(
+            STATIC_ROOT=str(self.root),
+            STATICFILES_DIRS=[str(tmp / "src")],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATICFILES_STORAGE="dashboard.storage.ParallelCompressedManifestStaticFilesStorage",
+            STATIC_COMPRESS_WORKERS=2,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name("css/site.css")
+        self.url = f"/static/{self.hashed}"
+
+    def get(self, url, accept_encoding=None):
+        extra = {"HTTP_ACCEPT_ENCODING": accept_encoding} if accept_encoding else {}
+        response = self.client.get(url, **extra)
+        content = b"".join(response.streaming_content)
+        response.close()
+        return response, content
+
+    def test_hashed_files_are_precompressed_and_immutable(self):
+        self.assertTrue((self.root / f"{self.hashed}.gz").exists())
+        self.assertFalse((self.root / "img" / "dot.png.gz").exists())
+
+        response, content = self.get(self.url, "gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(response["Cache-Control"], "max-age=315360000, public, immutable")
+        plain = (self.root / self.hashed).read_bytes()
+        self.assertEqual(gzip.decompress(content), plain)
+
+        response, content = self.get(self.url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(content, plain)
+
+    def test_unhashed_files_get_short_max_age(self):
+        response, _ = self.get("/static/css/site.css", "gzip")
+        self.assertEqual(response["Cache-Control"], "max-age=60, public")
+
+    @skipUnless(brotli_installed, "Brotli is not installed")
+    def test_brotli_is_preferred(self):
+        import brotli
+
+        response, content = self.get(self.url, "gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(content), (self.root / self.hashed).read_bytes())
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()  # keys derive from user ids, which the test database reuses
+        self.user = User.objects.create_user(email="idem@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, body, key="key-1", path="/api/todos/"):
+        return self.client.post(path, body, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retries_replay_the_stored_response(self):
+        first = self.post({"title": "once"})
+        cache.clear()  # the database copy is used when the cache lost the entry
+        with self.assertNumQueries(1):
+            second = self.post({"title": "once"})
+
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(Todo.objects.filter(owner=self.user).count(), 1)
+        self.assertEqual(self.post({"title": "once"}, key="key-2").status_code, 201)
+        self.assertEqual(Todo.objects.filter(owner=self.user).count(), 2)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self.post({"title": "once"})
+        self.assertEqual(self.post({"title": "twice"}).status_code, 422)
+
+    def test_keys_are_per_user(self):
+        self.post({"title": "mine"})
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(email="idem2@example.com", password="pw"))
+        response = other.post("/api/todos/", {"title": "mine"}, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Todo.objects.count(), 2)
+
+    def held_key(self, client_key):
+        """Record key for `client_key` on the todo list, locked as if a request were running."""
+        key = idempotency.record_key(SimpleNamespace(path="/api/todos/", user=self.user), client_key)
+        self.assertIsNone(idempotency.acquire(key))
+        return key
+
+    def test_duplicate_waits_for_in_flight_request(self):
+        key = self.held_key("key-1")
+        first = {"fingerprint": "", "status": 201, "content_type": "application/json",
+                 "content": b"{}"}
+
+        def finish():
+            time.sleep(0.1)
+            cache.set(idempotency._cache_key(key), first)
+            idempotency.release(key)
+
+        threading.Thread(target=finish).start()
+        self.assertEqual(idempotency.acquire(key), first)
+
+    def test_in_flight_timeout_returns_409(self):
+        self.held_key("held")
+        cache.clear()  # the claim is the database row, not a cache entry
+        with override_settings(IDEMPOTENCY_WAIT_SECONDS=0.1):
+            response = self.post({"title": "held"}, key="held")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(Todo.objects.filter(title="held").exists())
+
+    def test_waiting_duplicates_only_poll(self):
+        key = self.held_key("slow")
+        cache.clear()
+        with override_settings(IDEMPOTENCY_WAIT_SECONDS=0.5), CaptureQueriesContext(connection) as ctx:
+            with self.assertRaises(idempotency.IdempotencyConflict):
+                idempotency.acquire(key)
+        # Backoff: 0.05 + 0.1 + 0.2 + the rest, with no INSERT or UPDATE
+        # while the claim is live
+        self.assertLessEqual(len(ctx.captured_queries), 6)
+        self.assertTrue(all(q["sql"].startswith("SELECT") for q in ctx.captured_queries))
+
+    def test_abandoned_claims_are_taken_over(self):
+        key = self.held_key("crashed")
+        IdempotencyRecord.objects.filter(key=key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.post({"title": "retried"}, key="crashed")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(IdempotencyRecord.objects.get(key=key).status_code, 201)
+
+        idempotency.release(key)  # only unfinished claims are released
+        self.assertTrue(IdempotencyRecord.objects.filter(key=key).exists())
+
+    def test_batch_sub_requests_do_not_inherit_the_key(self):
+        body = {"requests": [
+            {"method": "POST", "path": "/api/todos/", "body": {"title": "a"}},
+            {"method": "POST", "path": "/api/todos/", "body": {"title": "b"}},
+        ]}
+        first = self.post(body, path="/api/batch/")
+        second = self.post(body, path="/api/batch/")
+        self.assertEqual([item["status"] for item in first.data["responses"]], [201, 201])
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Todo.objects.filter(owner=self.user).count(), 2)
+
+    def test_expired_records_are_purged(self):
+        self.post({"title": "old"})
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(idempotency.purge_expired(), 1)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="gzip@example.com", password="pw")
+        Todo.objects.bulk_create([Todo(owner=self.user, title=f"todo {i}", description="x" * 50)
+                                  for i in range(30)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_choose_encoding(self):
+        with override_settings(RESPONSE_COMPRESSION_ENCODINGS=["gzip"]):
+            self.assertEqual(compression.choose_encoding("gzip, deflate, br"), "gzip")
+            self.assertEqual(compression.choose_encoding("*"), "gzip")
+            self.assertIsNone(compression.choose_encoding("gzip;q=0, *"))
+            self.assertIsNone(compression.choose_encoding("identity"))
+            self.assertIsNone(compression.choose_encoding(""))
+        self.assertEqual(compression.parse_accept_encoding("br;q=0.5, GZIP;q=x"), {"br": 0.5, "gzip": 0.0})
+
+    def test_level_follows_body_size(self):
+        self.assertEqual(compression.level_for("gzip", 1000), 6)
+        self.assertEqual(compression.level_for("gzip", 100_000), 4)
+        self.assertEqual(compression.level_for("gzip", 10_000_000), 1)
+        self.assertEqual(compression.level_for("gzip", None), 1)
+
+    def test_json_pages_are_compressed(self):
+        plain = self.client.get("/api/todos/")
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get("/api/todos/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_small_and_non_json_responses_are_left_alone(self):
+        response = self.client.get("/api/auth/me/", {"fields": "id"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        html = HttpResponse("<p>" * 1000)
+        self.assertFalse(CompressionMiddleware(lambda r: html)(request).has_header("Content-Encoding"))
+
+    def test_streaming_and_etag(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        chunks = [b'{"rows": [', *[b'{"id": %d},' % i for i in range(200)], b"null]}"]
+        streamed = StreamingHttpResponse(iter(chunks), content_type="application/json")
+        streamed["ETag"] = '"abc"'
+
+        response = CompressionMiddleware(lambda r: streamed)(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), b"".join(chunks))
 
-# Create your tests here.
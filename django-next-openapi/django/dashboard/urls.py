@@ -1,7 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from dashboard.views.general import UserViewSet, TodoListCreateView, TodoRetrieveUpdateDestroyView
+from dashboard.views.general import (
+    UserViewSet,
+    TodoListCreateView,
+    TodoRetrieveUpdateDestroyView,
+    TodoStatsView,
+)
+from dashboard.views.batch import BatchView
 
 router = DefaultRouter()
 
@@ -11,5 +17,7 @@ router.register(r'users', UserViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path("todos/", TodoListCreateView.as_view(), name="todo-list-create"),
+    path("todos/stats/", TodoStatsView.as_view(), name="todo-stats"),
     path("todos/<uuid:id>/", TodoRetrieveUpdateDestroyView.as_view(), name="todo-detail"),
+    path("batch/", BatchView.as_view(), name="batch"),
 ]
\ No newline at end of file
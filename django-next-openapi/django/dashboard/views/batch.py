@@ -0,0 +1,169 @@
+# dashboard/views/batch.py
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, connection
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from dashboard.idempotency import IDEMPOTENCY_KEY_PARAM, IdempotentMixin
+from dashboard.querybudget import TIMEOUT_DETAIL, QueryBudget, is_statement_timeout
+from dashboard.serializers.batch import BatchRequestSerializer, BatchResponseSerializer
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the outer request body and must not leak into sub-requests.
+# The Idempotency-Key covers the batch as a whole, not each call in it.
+_BODY_META = ("CONTENT_TYPE", "CONTENT_LENGTH", "wsgi.input", "HTTP_CONTENT_TYPE", "HTTP_CONTENT_LENGTH",
+              "HTTP_IDEMPOTENCY_KEY")
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BATCH_MAX_WORKERS,
+                    thread_name_prefix="batch",
+                )
+    return _executor
+
+
+def _build_request(outer, method, path, body):
+    """Clone the outer request's environ (headers, cookies, host) for one sub-request."""
+    path_info, _, query_string = path.partition("?")
+    payload = b"" if body is None else json.dumps(body).encode("utf-8")
+
+    environ = {key: value for key, value in outer.META.items() if key not in _BODY_META}
+    environ.update({
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": query_string,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(payload)),
+        "wsgi.input": BytesIO(payload),
+    })
+    return WSGIRequest(environ)
+
+
+def _response_body(response):
+    if hasattr(response, "data"):
+        return response.data
+    content = getattr(response, "content", b"")
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode(response.charset or "utf-8", errors="replace")
+
+
+class BatchView(IdempotentMixin, generics.GenericAPIView):
+    """
+    Run several API calls in one round trip.
+
+    Sub-requests are dispatched in-process against the URLconf, bypassing
+    the middleware stack, and reuse the user already authenticated for the
+    batch. Consecutive GETs run concurrently on a shared thread pool; any
+    other method runs alone and in order, so later reads see earlier writes.
+    Every sub-request runs under its own view's query budget (statement
+    timeout and slow-query attribution), and one that hits the timeout is
+    answered with a 503 like a direct call.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BatchRequestSerializer
+
+    @extend_schema(
+        request=BatchRequestSerializer,
+        responses={200: BatchResponseSerializer},
+        parameters=[IDEMPOTENCY_KEY_PARAM],
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data["requests"]
+
+        # Installed on this thread's connection by QueryBudgetMiddleware
+        budget = getattr(request._request, "_query_budget", None)
+        results = [None] * len(items)
+        pending_reads = []
+        for index, item in enumerate(items):
+            if item["method"] == "GET":
+                pending_reads.append(index)
+                continue
+            self._run_reads(request, items, pending_reads, results, budget)
+            pending_reads = []
+            results[index] = self._dispatch(request, item, budget)
+        self._run_reads(request, items, pending_reads, results, budget)
+
+        response = Response(
+            {"responses": [{"status": code, "body": body} for code, body, _ in results]},
+            status=status.HTTP_200_OK,
+        )
+        for _, _, cookies in results:
+            response.cookies.update(cookies)
+        return response
+
+    def _run_reads(self, request, items, indexes, results, budget):
+        if len(indexes) < 2 or settings.BATCH_MAX_WORKERS < 2:
+            for index in indexes:
+                results[index] = self._dispatch(request, items[index], budget)
+            return
+
+        futures = {
+            index: _get_executor().submit(self._dispatch_in_thread, request, items[index])
+            for index in indexes
+        }
+        for index, future in futures.items():
+            results[index] = future.result()
+
+    def _dispatch_in_thread(self, request, item):
+        close_old_connections()
+        # The worker's connection is not the one QueryBudgetMiddleware wrapped
+        budget = QueryBudget(connection)
+        try:
+            with connection.execute_wrapper(budget):
+                return self._dispatch(request, item, budget)
+        finally:
+            budget.reset()
+            close_old_connections()
+
+    def _dispatch(self, request, item, budget):
+        sub = _build_request(request._request, item["method"], item["path"], item.get("body"))
+        # Reuse the batch's authentication instead of re-validating the JWT per call
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        sub.user = request.user
+
+        try:
+            match = resolve(sub.path_info)
+            sub.resolver_match = match
+            scope = budget.for_view(match.func, sub.path, match.url_name) if budget else nullcontext()
+            with scope:
+                response = match.func(sub, *match.args, **match.kwargs)
+        except (Resolver404, Http404):
+            return status.HTTP_404_NOT_FOUND, {"detail": "Not found."}, {}
+        except PermissionDenied:
+            return status.HTTP_403_FORBIDDEN, {"detail": "Permission denied."}, {}
+        except Exception as exc:
+            if is_statement_timeout(exc):
+                logger.warning("Statement timeout in batch sub-request: %s %s", item["method"], item["path"])
+                return status.HTTP_503_SERVICE_UNAVAILABLE, {"detail": TIMEOUT_DETAIL}, {}
+            logger.exception("Batch sub-request failed: %s %s", item["method"], item["path"])
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {"detail": "Internal server error."}, {}
+
+        return response.status_code, _response_body(response), response.cookies
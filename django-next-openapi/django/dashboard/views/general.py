@@ -14,11 +14,14 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework import generics, permissions
 from rest_framework.exceptions import PermissionDenied
-from dashboard.models import Todo
+from dashboard.models import Todo, TodoStats
 
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse
 
-from dashboard.views.helpers import AuthenticatedViewSet
+from dashboard.filters import sparse_fieldset_parameters
+from dashboard.idempotency import IDEMPOTENCY_KEY_PARAM, IdempotentMixin
+from dashboard.response_cache import ResponseCacheMixin
+from dashboard.views.helpers import AuthenticatedViewSet, CompiledListMixin
 from dashboard.serializers import general as serializers
  
 logger = logging.getLogger(__name__)
@@ -35,40 +38,97 @@ def get_by_query_or_400(request, model, param_map: dict):
         kwargs[lookup] = val
     return get_object_or_404(model, **kwargs)
 
-class UserViewSet(AuthenticatedViewSet):
+@extend_schema_view(
+    retrieve=extend_schema(parameters=sparse_fieldset_parameters(serializers.UserSerializer)),
+)
+class UserViewSet(ResponseCacheMixin, AuthenticatedViewSet):
     queryset = User.objects.all()
     serializer_class = serializers.UserSerializer
-    filterset_fields = ["id", "email", "name", "phone", "birthday", "created_at", "updated_at"]
+    # The list shows every user, so any user's change invalidates it
+    response_cache_scopes = ("user", "users")
+    # Every field listed here must be index-backed (see dashboard.checks)
+    filterset_fields = ["id", "email", "phone", "created_at"]
+    ordering_fields = ["id", "email", "created_at"]
 
     def get_object(self):
         # Always operate on the authenticated user for /users/me style endpoints
         return self.request.user
     
 
+INCLUDE_ARCHIVED_PARAM = OpenApiParameter(
+    "include_archived", bool, OpenApiParameter.QUERY,
+    description="Also return todos that were moved to the archive.",
+)
+
+
+def include_archived(request):
+    return request.query_params.get("include_archived", "").lower() in ("1", "true", "yes")
+
+
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
+        return obj.owner_id == request.user.pk
 
-class TodoListCreateView(generics.ListCreateAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=[INCLUDE_ARCHIVED_PARAM]),
+    post=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAM]),
+)
+class TodoListCreateView(IdempotentMixin, ResponseCacheMixin, CompiledListMixin, generics.ListCreateAPIView):
     serializer_class = serializers.TodoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Lists are always scoped to one owner, so (owner, ...) indexes apply
+    index_scope = ("owner",)
+    filterset_fields = ["is_complete"]
+    ordering_fields = ["created_at"]
 
     def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Todo.objects.none()
         # Only return todos for the authenticated user
-        return Todo.objects.filter(owner=self.request.user).order_by("-created_at")
+        queryset = Todo.objects.filter(owner=self.request.user)
+        if not include_archived(self.request):
+            queryset = queryset.unarchived()
+        return queryset.select_related("owner").order_by("-created_at")
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class TodoRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+@extend_schema_view(
+    get=extend_schema(
+        parameters=[*sparse_fieldset_parameters(serializers.TodoSerializer), INCLUDE_ARCHIVED_PARAM],
+    ),
+)
+class TodoRetrieveUpdateDestroyView(ResponseCacheMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = serializers.TodoSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     lookup_field = "id"
-    queryset = Todo.objects.all()
+    queryset = Todo.objects.select_related("owner")
+    # Ownership is checked on every request, even for sparse fieldsets
+    sparse_required_fields = ("owner",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Archived todos are read-only and only visible on request
+        if self.request.method in permissions.SAFE_METHODS and include_archived(self.request):
+            return queryset
+        return queryset.unarchived()
 
     def get_object(self):
         obj = super().get_object()
         # IsOwner permission will check ownership; raise PermissionDenied for clarity
-        if obj.owner != self.request.user:
+        if obj.owner_id != self.request.user.pk:
             raise PermissionDenied("You do not have permission to access this Todo.")
-        return obj
\ No newline at end of file
+        return obj
+
+class TodoStatsView(generics.RetrieveAPIView):
+    """Open/completed counters for the current user, read from TodoStats."""
+    serializer_class = serializers.TodoStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = []
+
+    def get_object(self):
+        stats = TodoStats.objects.filter(user=self.request.user).first()
+        if stats is None:
+            TodoStats.objects.reconcile([self.request.user.pk])
+            stats = TodoStats.objects.get(user=self.request.user)
+        return stats
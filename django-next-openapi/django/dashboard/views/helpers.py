@@ -1,14 +1,43 @@
 # dashboard/api_permissions.py
 from django.db.models import Q
 from rest_framework import viewsets, permissions
+from rest_framework.response import Response
 from dashboard import models
+from dashboard.fieldsets import get_requested_fields
+from dashboard.serializers.compiled import compile_serializer
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters as drf_filters
+from dashboard.filters import IndexedOrderingFilter, SparseFieldsetFilterBackend
 
-class AuthenticatedViewSet(viewsets.ModelViewSet):
+class CompiledListMixin:
+    """
+    Serves list() from `.values()` rows through the compiled form of the
+    serializer (dashboard.serializers.compiled). Output is identical to the
+    regular serializer; views whose serializer can't be compiled fall back.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        fields = get_requested_fields(request, compiled.field_names)
+        rows = compiled.values(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page, fields))
+        return Response(compiled.serialize(rows, fields))
+
+
+class AuthenticatedViewSet(CompiledListMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter]
+    filter_backends = [
+        DjangoFilterBackend,
+        drf_filters.SearchFilter,
+        IndexedOrderingFilter,
+        SparseFieldsetFilterBackend,
+    ]
 
 
 class OwnedObjectMixin:
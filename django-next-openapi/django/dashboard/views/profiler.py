@@ -0,0 +1,58 @@
+# dashboard/views/profiler.py
+from django.contrib import admin, messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.views.decorators.http import require_http_methods
+
+from dashboard import profiler
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def profiler_admin(request):
+    """Toggle sampling and list the profiles collected so far."""
+    if request.method == "POST":
+        action = request.POST.get("action")
+        if action == "enable":
+            try:
+                percent = min(max(float(request.POST.get("percent") or 0), 0), 100)
+                minutes = max(int(request.POST.get("minutes") or 10), 1)
+            except ValueError:
+                messages.error(request, "Percent and minutes must be numbers.")
+                return redirect("admin-profiler")
+            routes = [route.strip() for route in request.POST.get("routes", "").split(",") if route.strip()]
+            profiler.set_config(percent, routes, minutes)
+            messages.success(request, f"Sampling switched on for {minutes} minute(s).")
+        elif action == "disable":
+            profiler.clear_config()
+            messages.success(request, "Sampling switched off.")
+        elif action == "reset":
+            profiler.reset_profiles()
+            messages.success(request, "Profiles cleared.")
+        return redirect("admin-profiler")
+
+    profiles = profiler.get_profiles()
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request profiler",
+        "config": profiler.get_config(),
+        "profiles": sorted(
+            ({"view": name, **profile} for name, profile in profiles.items()),
+            key=lambda profile: -profile["samples"],
+        ),
+    }
+    return TemplateResponse(request, "admin/profiler.html", context)
+
+
+@staff_member_required
+def profiler_download(request):
+    """Collapsed stacks (all views, or ?view=) for flamegraph tools."""
+    view_name = request.GET.get("view")
+    response = HttpResponse(
+        profiler.collapsed(profiler.get_profiles(), view_name), content_type="text/plain; charset=utf-8"
+    )
+    filename = f"{view_name or 'profiles'}.folded"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,4 +1,13 @@
 # dashboard_project/__init__.py
-from .celery import app as celery_app
+# The Celery app is imported on first access (celery -A main, dashboard.tasks)
+# rather than here, so web processes and manage.py don't pay for it at boot.
+
+
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ('celery_app',)
@@ -1,8 +1,9 @@
 # main/settings.py
 import os  # Added for environment variables
+import sys
 from datetime import timedelta
-from distutils.util import strtobool
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,8 +11,23 @@ load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+
+def env_bool(name, default="False"):
+    # Same spellings distutils.util.strtobool accepted, without importing distutils
+    value = os.getenv(name, default).strip().lower()
+    if value in ("y", "yes", "t", "true", "on", "1"):
+        return True
+    if value in ("n", "no", "f", "false", "off", "0"):
+        return False
+    raise ValueError(f"Invalid boolean for {name}: {value!r}")
+
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = bool(strtobool(os.getenv("DJANGO_DEBUG", "False")))
+DEBUG = env_bool("DJANGO_DEBUG")
+
+# gunicorn and celery workers don't need developer tooling such as django_extensions
+MANAGEMENT_COMMAND = Path(sys.argv[0]).name == "manage.py"
 
 ROOT_DOMAIN = os.getenv('ROOT_DOMAIN')
 ALLOWED_HOSTS = [f'api.django-next.{ROOT_DOMAIN}', os.getenv('NEXT_DOMAIN'), os.getenv('SERVER_IP'),'django', 'localhost']
@@ -27,6 +43,7 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True  # Allow sending authentication cookies
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 CSRF_COOKIE_SECURE = True
 CSRF_COOKIE_DOMAIN = f'api.django-next.{ROOT_DOMAIN}'
@@ -88,15 +105,16 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt.token_blacklist',
     'drf_spectacular',
     'django_filters',
-    'django_extensions',
     'corsheaders',
-    'celery',
 
     # Our own
     'access.apps.AccessConfig',
     'dashboard.apps.DashboardConfig',
 ]
 
+if MANAGEMENT_COMMAND or env_bool('DJANGO_EXTENSIONS'):
+    INSTALLED_APPS.append('django_extensions')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'access.auth.CookieJWTAuthentication',  # use your custom auth class
@@ -106,9 +124,10 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.OrderingFilter',
+        'dashboard.filters.IndexedOrderingFilter',
         "rest_framework.filters.SearchFilter",
         "dashboard.filters.TimestampFilterBackend",
+        "dashboard.filters.SparseFieldsetFilterBackend",
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100
@@ -117,6 +136,54 @@ REST_FRAMEWORK = {
 # Use our custom user model from the dashboard app
 AUTH_USER_MODEL = 'dashboard.User'
 
+AUTHENTICATION_BACKENDS = [
+    'dashboard.perm_cache.CachedModelBackend',  # ModelBackend with cached groups/permissions
+]
+
+# Shared cache (Redis) when configured, otherwise per-process memory
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Per-process tier of the response cache (dashboard/response_cache.py)
+CACHES['response_local'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'response-cache',
+    'OPTIONS': {'MAX_ENTRIES': 5000},
+}
+
+# Version bumps must reach every worker, so only cache with a shared backend
+PERMISSION_CACHE_ENABLED = env_bool('PERMISSION_CACHE_ENABLED', 'True' if CACHE_REDIS_URL else 'False')
+PERMISSION_CACHE_ALIAS = 'default'
+PERMISSION_CACHE_TIMEOUT = int(os.getenv('PERMISSION_CACHE_TIMEOUT', '3600'))
+
+RESPONSE_CACHE_ENABLED = env_bool('RESPONSE_CACHE_ENABLED', 'True' if CACHE_REDIS_URL else 'False')  # needs a shared cache too
+RESPONSE_CACHE_LOCAL_ALIAS = 'response_local'
+RESPONSE_CACHE_SHARED_ALIAS = 'default' if CACHE_REDIS_URL else None  # None: local tier only
+RESPONSE_CACHE_LOCAL_TIMEOUT = 60
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# JSON response compression (dashboard/compression.py); zstd and br need zstandard / Brotli
+RESPONSE_COMPRESSION_ENABLED = env_bool('RESPONSE_COMPRESSION_ENABLED', 'True')
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', '1024'))  # bytes
+RESPONSE_COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']  # preferred first, when the client accepts several
+RESPONSE_COMPRESSION_LEVELS = {  # (up to N bytes, level); None is the last tier, also used when streaming
+    'gzip': [(16 * 1024, 6), (256 * 1024, 4), (None, 1)],
+    'br': [(16 * 1024, 6), (256 * 1024, 4), (None, 1)],
+    'zstd': [(16 * 1024, 9), (256 * 1024, 3), (None, 1)],
+}
+
+# Idempotency-Key handling for POSTs (dashboard/idempotency.py)
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))  # seconds a stored response is replayed
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # in-flight marker; frees the key if a worker dies mid-request
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '10'))  # duplicates wait this long, then 409
+
 # Configure email (adjust as needed for your email provider)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST')
@@ -139,6 +206,31 @@ STRIPE_SECRET_KEY = os.getenv('STRIPE_TEST_SECRET_KEY', default=None)
 STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_TEST_PUBLISHABLE_KEY', default=None)
 STRIPE_WEBHOOK_SECRET_KEY = os.getenv('STRIPE_TEST_WEBHOOK_SECRET_KEY', default=None)
 
+# Query budgets (dashboard.middleware.QueryBudgetMiddleware); 0 disables the timeout
+STATEMENT_TIMEOUT_MS = int(os.getenv('STATEMENT_TIMEOUT_MS', '5000'))
+STATEMENT_TIMEOUTS = {  # per URL name, in ms; views may also set `statement_timeout`
+    'user-list': 2000,
+    'todo-list-create': 2000,
+}
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+# The report is read by `manage.py slow_query_report` in its own process, so it needs a shared cache
+SLOW_QUERY_REPORT_ENABLED = env_bool('SLOW_QUERY_REPORT_ENABLED', 'True' if CACHE_REDIS_URL else 'False')
+SLOW_QUERY_REPORT_SIZE = 200  # distinct (view, query) entries tracked until the next --reset
+
+# Sampling profiler (dashboard.profiler); the middleware is left out unless enabled.
+# Sampling can also be switched on for a while from /admin/profiler/.
+PROFILER_ENABLED = env_bool('PROFILER_ENABLED')  # needs a shared cache: the admin toggle and profiles are read by every worker
+PROFILER_SAMPLE_PERCENT = float(os.getenv('PROFILER_SAMPLE_PERCENT', '0'))
+PROFILER_ROUTES = [route for route in os.getenv('PROFILER_ROUTES', '').split(',') if route]  # URL names or path prefixes
+PROFILER_INTERVAL_MS = float(os.getenv('PROFILER_INTERVAL_MS', '5'))
+
+# Cold-start budget for `import main.wsgi`, checked by the test suite (manage.py profile_startup)
+STARTUP_IMPORT_BUDGET_MS = int(os.getenv('STARTUP_IMPORT_BUDGET_MS', '1500'))
+
+# Batch endpoint (/api/batch/)
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '4'))  # threads for concurrent GETs
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=6),  # adjust as needed
     'REFRESH_TOKEN_LIFETIME': timedelta(days=3),
@@ -159,27 +251,31 @@ SPECTACULAR_SETTINGS = {
     'SERVE_PERMISSIONS': [],  # ensure it's publicly accessible
     'DEFAULT_FORMAT': 'json',
     'COMPONENT_SPLIT_REQUEST': True,
-    "POSTPROCESSING_HOOKS": [
-        "dashboard.hooks.add_timestamp_query_params",
-    ],
+    # Timestamp filters are documented per view by dashboard.filters.TimestampFilterBackend
+    "POSTPROCESSING_HOOKS": [],
 }
 
 MIDDLEWARE = [
+    'dashboard.middleware.CompressionMiddleware',
     'access.middleware.RequestLoggingMiddleware',
     'dashboard.middleware.RequestLoggingMiddleware',
+    'dashboard.middleware.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Must come first!
     'django.middleware.security.SecurityMiddleware',
+    # Serves static files (and their .br/.gz variants) before the session, CSRF and auth middleware run
+    'dashboard.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',  # Now follows after CorsMiddleware
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Can follow here or later if needed
+    'dashboard.middleware.ProfilingMiddleware',
 ]
 
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATICFILES_STORAGE = 'dashboard.storage.ParallelCompressedManifestStaticFilesStorage'
+STATIC_COMPRESS_WORKERS = int(os.getenv('STATIC_COMPRESS_WORKERS', os.cpu_count() or 1))  # collectstatic threads
 
 ROOT_URLCONF = 'main.urls'
 
@@ -216,6 +312,44 @@ DATABASES = {
     }
 }
 
+# Password hashing (access/hashers.py). The selected profile hashes new and
+# upgraded passwords; the others only verify existing hashes, which are
+# rehashed with the selected profile on the next successful login.
+PASSWORD_HASHING_PROFILE = os.getenv('PASSWORD_HASHING_PROFILE', 'scrypt')
+PASSWORD_HASHING_PARAMS = {
+    'argon2id': {  # requires argon2-cffi
+        'time_cost': int(os.getenv('ARGON2_TIME_COST', '2')),
+        'memory_cost': int(os.getenv('ARGON2_MEMORY_COST', '19456')),  # KiB
+        'parallelism': int(os.getenv('ARGON2_PARALLELISM', '1')),
+    },
+    'scrypt': {
+        'work_factor': int(os.getenv('SCRYPT_WORK_FACTOR', str(2 ** 14))),
+        'block_size': int(os.getenv('SCRYPT_BLOCK_SIZE', '8')),
+        'parallelism': int(os.getenv('SCRYPT_PARALLELISM', '1')),
+    },
+    'pbkdf2': {
+        'iterations': int(os.getenv('PBKDF2_ITERATIONS', '600000')),
+    },
+}
+PASSWORD_HASHER_PROFILES = {
+    'argon2id': 'access.hashers.Argon2idPasswordHasher',
+    'scrypt': 'access.hashers.TunedScryptPasswordHasher',
+    'pbkdf2': 'access.hashers.TunedPBKDF2PasswordHasher',
+}
+# An unknown profile falls back to scrypt here and is reported by access.E001
+_DEFAULT_PASSWORD_HASHER = PASSWORD_HASHER_PROFILES.get(PASSWORD_HASHING_PROFILE, PASSWORD_HASHER_PROFILES['scrypt'])
+PASSWORD_HASHERS = [
+    _DEFAULT_PASSWORD_HASHER,
+    *(path for path in PASSWORD_HASHER_PROFILES.values() if path != _DEFAULT_PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+# Threads for hashing off the request thread (0 hashes inline), plus how
+# many more hashes may wait for one before callers get a 503
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '0'))
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', '16'))
+PASSWORD_HASHING_WAIT_SECONDS = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -260,4 +394,44 @@ CELERY_BROKER_CONNECTION_RETRY = True
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True  # To retain existing behavior
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
-CELERY_BEAT_SCHEDULE = {}
\ No newline at end of file
+CELERY_BEAT_SCHEDULE = {
+    'maintain-todo-partitions': {
+        'task': 'dashboard.tasks.maintain_todo_partitions',
+        'schedule': timedelta(hours=6),
+    },
+    'relay-outbox-events': {
+        'task': 'dashboard.tasks.relay_outbox_events',
+        'schedule': timedelta(seconds=5),
+        # Drop runs that queue up behind a slow one instead of piling them on
+        'options': {'expires': 5},
+    },
+    'purge-outbox': {
+        'task': 'dashboard.tasks.purge_outbox',
+        'schedule': timedelta(days=1),
+    },
+    'purge-idempotency-records': {
+        'task': 'dashboard.tasks.purge_idempotency_records',
+        'schedule': timedelta(hours=1),
+    },
+}
+
+# Todo storage. TODO_PARTITIONING is read when dashboard migration 0002 runs:
+# "" (plain table), "range" (monthly by created_at) or "hash" (by owner).
+TODO_PARTITIONING = os.getenv('TODO_PARTITIONING', '')
+TODO_PARTITION_MONTHS_AHEAD = int(os.getenv('TODO_PARTITION_MONTHS_AHEAD', '3'))
+TODO_HASH_PARTITIONS = int(os.getenv('TODO_HASH_PARTITIONS', '8'))
+TODO_ARCHIVE_AFTER_DAYS = int(os.getenv('TODO_ARCHIVE_AFTER_DAYS', '90'))
+TODO_ARCHIVE_BATCH_SIZE = int(os.getenv('TODO_ARCHIVE_BATCH_SIZE', '1000'))
+
+# Transactional outbox (dashboard/outbox.py). Handlers are keyed by
+# event type pattern, e.g. {'todo.*': ['dashboard.outbox.log_event']} or,
+# to queue welcome mails, {'user.created': ['dashboard.outbox.send_welcome_email']}.
+OUTBOX_HANDLERS = {}
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_WRITE_CHUNK_SIZE = 1000  # rows per chunk when set-based updates write their events
+OUTBOX_MAX_BATCHES = int(os.getenv('OUTBOX_MAX_BATCHES', '10'))  # per relay run
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_RETRY_BASE_SECONDS = 5
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_BACKLOG_WARNING = 10000
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
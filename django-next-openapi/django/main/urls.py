@@ -1,18 +1,36 @@
 from django.contrib import admin
 from django.urls import path, include
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+from dashboard.views.profiler import profiler_admin, profiler_download
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """
+    Import a class-based view on its first request. Used for the schema
+    routes so drf-spectacular's generator is only loaded when it's needed.
+    """
+    view = None
+
+    @csrf_exempt
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return dispatch
 
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-    SpectacularRedocView,
-)
 
 urlpatterns = [
+    path('admin/profiler/', profiler_admin, name='admin-profiler'),
+    path('admin/profiler/download/', profiler_download, name='admin-profiler-download'),
     path('admin/', admin.site.urls),
     path('api/', include('dashboard.urls')),
     path('api/auth/', include('access.urls')),
     
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
-]
\ No newline at end of file
+    path('schema/', lazy_view('drf_spectacular.views.SpectacularAPIView'), name='schema'),
+    path('swagger/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
+]